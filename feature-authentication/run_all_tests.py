@@ -6,6 +6,7 @@ Feature Authentication Module - 全局测试脚本
 
 import sys
 import logging
+import traceback
 from pathlib import Path
 
 # 添加src到路径
@@ -54,8 +55,7 @@ def run_test_suite(test_module_name, test_description):
             
     except Exception as e:
         logger.error(f"[失败] {test_description} - 异常: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.error("Traceback:\n%s", traceback.format_exc())
         return (False, 1)
 
 
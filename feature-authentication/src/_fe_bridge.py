@@ -11,7 +11,8 @@ from pathlib import Path
 # 保存当前sys.modules状态
 _saved_modules = {}
 _fe_modules_to_save = ['src', 'src.feature_encryption', 'src.config', 'src.key_derivation',
-                       'src.fuzzy_extractor', 'src.quantizer', 'src.feature_processor']
+                       'src.fuzzy_extractor', 'src.quantizer', 'src.feature_processor',
+                       'src.helper_store']
 
 def _save_and_clear_src_modules():
     """保存并清除src相关模块"""
@@ -9,9 +9,13 @@ from typing import Optional
 import struct
 
 
+# TokenFast定长头部：dev_id(6) + t_start(4) + t_expire(4) + policy_len(1)
+_TOKEN_FAST_HEADER = struct.Struct('<6sIIB')
+
+
 # ==================== 基础数据结构 ====================
 
-@dataclass
+@dataclass(slots=True)
 class DeviceIdentity:
     """设备标识
 
@@ -36,7 +40,7 @@ class DeviceIdentity:
             raise ValueError(f"epoch must be in [0, 2^32-1], got {self.epoch}")
 
 
-@dataclass
+@dataclass(slots=True)
 class AuthContext:
     """认证上下文
 
@@ -106,7 +110,7 @@ class AuthContext:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class AuthResult:
     """认证结果
 
@@ -140,7 +144,7 @@ class AuthResult:
 
 # ==================== 模式一数据结构 ====================
 
-@dataclass
+@dataclass(slots=True)
 class RFFJudgment:
     """物理层RFF判定结果
 
@@ -212,10 +216,7 @@ class TokenFast:
         policy_len = len(policy_bytes)
 
         return (
-            self.dev_id +
-            struct.pack('<I', self.t_start) +
-            struct.pack('<I', self.t_expire) +
-            struct.pack('<B', policy_len) +
+            _TOKEN_FAST_HEADER.pack(self.dev_id, self.t_start, self.t_expire, policy_len) +
             policy_bytes +
             self.mac
         )
@@ -233,22 +234,12 @@ class TokenFast:
         Raises:
             ValueError: 数据格式错误
         """
-        if len(data) < 6 + 4 + 4 + 1 + 16:
+        if len(data) < _TOKEN_FAST_HEADER.size + 16:
             raise ValueError(f"Invalid TokenFast data length: {len(data)}")
 
-        offset = 0
-
-        dev_id = data[offset:offset + 6]
-        offset += 6
-
-        t_start = struct.unpack('<I', data[offset:offset + 4])[0]
-        offset += 4
-
-        t_expire = struct.unpack('<I', data[offset:offset + 4])[0]
-        offset += 4
-
-        policy_len = data[offset]
-        offset += 1
+        # 定长头部一次解包
+        dev_id, t_start, t_expire, policy_len = _TOKEN_FAST_HEADER.unpack_from(data)
+        offset = _TOKEN_FAST_HEADER.size
 
         policy = data[offset:offset + policy_len].decode('utf-8')
         offset += policy_len
@@ -266,7 +257,7 @@ class TokenFast:
 
 # ==================== 模式二数据结构 ====================
 
-@dataclass
+@dataclass(slots=True)
 class AuthReq:
     """认证请求报文（模式二）
 
@@ -18,7 +18,7 @@ from .utils import generate_random_key, format_bytes_preview
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class RFFTemplate:
     """RFF模板数据
     
@@ -316,14 +316,8 @@ class Mode1FastAuth:
         
         # 步骤一：接收RFF判定
         logger.info("Step 1: Receiving RFF judgment from PHY layer...")
-        rff_judgment = self.rff_matcher.match(dev_id, observed_features, snr)
-        
-        logger.info(f"  RFF result: pass={rff_judgment.rff_pass}, score={rff_judgment.rff_score:.3f}")
         
-        # 步骤二：链路层快速决策
-        logger.info("Step 2: Link layer fast decision...")
-        
-        # 2.1 检查设备是否在注册列表
+        # 先检查设备是否在注册列表，未注册设备无需执行RFF匹配
         if dev_id not in self._device_registry:
             logger.error("  [FAIL] Device not in registry")
             logger.info("="*80)
@@ -335,7 +329,14 @@ class Mode1FastAuth:
         
         logger.debug("  [OK] Device found in registry")
         
-        # 2.2 检查RFF判定结果
+        rff_judgment = self.rff_matcher.match(dev_id, observed_features, snr)
+        
+        logger.info(f"  RFF result: pass={rff_judgment.rff_pass}, score={rff_judgment.rff_score:.3f}")
+        
+        # 步骤二：链路层快速决策
+        logger.info("Step 2: Link layer fast decision...")
+        
+        # 2.1 检查RFF判定结果
         if not rff_judgment.rff_pass:
             logger.error(f"  [FAIL] RFF judgment failed (pass=False)")
             logger.info("="*80)
@@ -347,7 +348,7 @@ class Mode1FastAuth:
         
         logger.debug("  [OK] RFF judgment passed")
         
-        # 2.3 检查RFF得分是否满足阈值
+        # 2.2 检查RFF得分是否满足阈值
         if rff_judgment.rff_score < self.config.RFF_THRESHOLD:
             logger.warning(f"  [FAIL] RFF score {rff_judgment.rff_score:.3f} < threshold {self.config.RFF_THRESHOLD}")
             logger.info("="*80)
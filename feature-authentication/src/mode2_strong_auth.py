@@ -22,6 +22,7 @@ from .utils import (
     hash_data,
     compute_mac,
     truncate,
+    truncate_view,
     constant_time_compare,
     generate_nonce,
     format_bytes_preview,
@@ -370,9 +371,20 @@ class VerifierSide:
         Returns:
             bytes: 伪名（12字节）
         """
+        return truncate(self._pseudo_hash(K, epoch), self.config.PSEUDO_LENGTH)
+
+    def _pseudo_hash(self, K: bytes, epoch: int) -> bytes:
+        """计算伪名的完整哈希值（截断前）
+
+        Args:
+            K: 特征密钥
+            epoch: 时间窗编号
+
+        Returns:
+            bytes: 哈希值（32字节）
+        """
         msg = b"Pseudo" + K + struct.pack('<I', epoch)
-        hash_val = hash_data(msg, algorithm=self.config.HASH_ALGORITHM, length=32)
-        return truncate(hash_val, self.config.PSEUDO_LENGTH)
+        return hash_data(msg, algorithm=self.config.HASH_ALGORITHM, length=32)
 
     def locate_device(self, dev_pseudo: bytes, epoch: int) -> Optional[bytes]:
         """根据伪名定位设备
@@ -389,7 +401,8 @@ class VerifierSide:
         logger.info(f"Locating device for pseudo={format_bytes_preview(dev_pseudo, 24)}, epoch={epoch}")
 
         for dev_id, (K, registered_epoch) in self.device_registry.items():
-            expected_pseudo = self.generate_pseudo(K, epoch)
+            # 仅用于比较，使用零拷贝截断
+            expected_pseudo = truncate_view(self._pseudo_hash(K, epoch), self.config.PSEUDO_LENGTH)
 
             logger.debug(f"  Checking dev_id={dev_id.hex()}")
             logger.debug(f"    Expected pseudo: {format_bytes_preview(expected_pseudo, 24)}")
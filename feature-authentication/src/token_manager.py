@@ -4,20 +4,47 @@
 管理TokenFast（模式一）和MAT（模式二）的生成、验证和存储。
 """
 
-import secrets
 import struct
+import threading
 import time
 import logging
-from typing import Dict, Optional, Tuple
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
 
 from .config import AuthConfig
 from .common import TokenFast, MAT
-from .utils import compute_mac, constant_time_compare, format_bytes_preview
+from .utils import compute_mac, constant_time_compare, format_bytes_preview, pooled_random_bytes
 
 
 logger = logging.getLogger(__name__)
 
 
+# 日志分隔线
+_BANNER = "=" * 60
+
+# 预编译的消息布局（避免每次调用重新解析格式串）
+# TokenFast MAC消息头：dev_id(6) || t_start(4) || t_expire(4)，其后紧跟policy
+_TF_STRUCT = struct.Struct('<6sII')
+# MAT签名消息：issuer(6) || dev_pseudo(12) || epoch(4) || ttl(4) || mat_id(16)
+_MAT_STRUCT = struct.Struct('<6s12sII16s')
+
+
+def _store_key(identifier: bytes) -> int:
+    """将dev_id/mat_id转换为整数存储键
+
+    int的哈希计算远比bytes的SipHash便宜，仅用于内部存储，对外接口仍为bytes。
+    转换会丢失长度信息（尾部零字节不影响结果），调用方须先校验标识长度。
+
+    Args:
+        identifier: 设备标识或MAT标识
+
+    Returns:
+        int: 存储键
+    """
+    return int.from_bytes(identifier, 'little')
+
+
 class TokenFastManager:
     """快速令牌管理器（模式一）
 
@@ -41,10 +68,17 @@ class TokenFastManager:
 
         self.k_mgmt = k_mgmt
 
-        # 令牌存储：dev_id -> TokenFast
-        self._token_store: Dict[bytes, TokenFast] = {}
+        # 令牌存储：int(dev_id) -> TokenFast
+        self._token_store: Dict[int, TokenFast] = {}
+
+        # 策略编码缓存：policy -> UTF-8字节（策略取值集合很小且固定）
+        self._policy_cache: Dict[str, bytes] = {}
+
+        # 已验证令牌缓存：int(dev_id) -> (t_start, t_expire, policy, mac)
+        # 同一令牌重复验证时只需检查时间窗，无需重新计算MAC
+        self._verified_tokens: Dict[int, Tuple[int, int, str, bytes]] = {}
 
-        logger.info(f"TokenFastManager initialized with k_mgmt length={len(k_mgmt)}")
+        logger.info("TokenFastManager initialized with k_mgmt length=%d", len(k_mgmt))
 
     def issue_token_fast(
         self,
@@ -63,8 +97,9 @@ class TokenFastManager:
         Raises:
             ValueError: dev_id无效
         """
-        logger.info(f"Issuing TokenFast for device {dev_id.hex()}")
-        logger.debug(f"  Policy: {policy}, TTL: {self.config.TOKEN_FAST_TTL}s")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Issuing TokenFast for device %s", dev_id.hex())
+        logger.debug("  Policy: %s, TTL: %ss", policy, self.config.TOKEN_FAST_TTL)
 
         if len(dev_id) != 6:
             raise ValueError(f"dev_id must be 6 bytes, got {len(dev_id)}")
@@ -73,17 +108,12 @@ class TokenFastManager:
         t_start = int(time.time())
         t_expire = t_start + self.config.TOKEN_FAST_TTL
 
-        logger.debug(f"  t_start: {t_start}, t_expire: {t_expire}")
+        logger.debug("  t_start: %s, t_expire: %s", t_start, t_expire)
 
         # 计算MAC
         # MAC = MAC(K_mgmt, dev_id || t_start || t_expire || policy)
-        policy_bytes = policy.encode('utf-8')
-        msg = (
-            dev_id +
-            struct.pack('<I', t_start) +
-            struct.pack('<I', t_expire) +
-            policy_bytes
-        )
+        policy_bytes = self._encode_policy(policy)
+        msg = self._pack_mac_message(dev_id, t_start, t_expire, policy_bytes)
 
         mac = compute_mac(
             key=self.k_mgmt,
@@ -92,7 +122,8 @@ class TokenFastManager:
             length=16
         )
 
-        logger.debug(f"  MAC computed: {format_bytes_preview(mac, 16)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("  MAC computed: %s", format_bytes_preview(mac, 16))
 
         # 创建令牌
         token = TokenFast(
@@ -104,9 +135,9 @@ class TokenFastManager:
         )
 
         # 存储令牌
-        self._token_store[dev_id] = token
+        self._token_store[_store_key(dev_id)] = token
 
-        logger.info(f"✓ TokenFast issued: expires at {t_expire} (in {self.config.TOKEN_FAST_TTL}s)")
+        logger.info("✓ TokenFast issued: expires at %s (in %ss)", t_expire, self.config.TOKEN_FAST_TTL)
         return token
 
     def verify_token_fast(
@@ -123,32 +154,47 @@ class TokenFastManager:
         Returns:
             bool: 是否验证通过
         """
-        logger.info(f"Verifying TokenFast for device {token.dev_id.hex()}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Verifying TokenFast for device %s", token.dev_id.hex())
+
+        # 存储键与MAC消息头均按定长布局编码，长度不符的dev_id会与合法设备冲突
+        if len(token.dev_id) != 6:
+            logger.warning("✗ Invalid dev_id length: %d", len(token.dev_id))
+            return False
 
         if current_time is None:
             current_time = int(time.time())
 
-        logger.debug(f"  Current time: {current_time}, Token expires: {token.t_expire}")
+        logger.debug("  Current time: %s, Token expires: %s", current_time, token.t_expire)
 
         # 检查过期
         if current_time > token.t_expire:
-            logger.warning(f"✗ Token expired (current={current_time}, expire={token.t_expire})")
+            logger.warning("✗ Token expired (current=%s, expire=%s)", current_time, token.t_expire)
             return False
 
         if current_time < token.t_start:
-            logger.warning(f"✗ Token not yet valid (current={current_time}, start={token.t_start})")
+            logger.warning("✗ Token not yet valid (current=%s, start=%s)", current_time, token.t_start)
             return False
 
-        logger.debug(f"✓ Time check passed")
+        logger.debug("✓ Time check passed")
+
+        # 已验证过的同一令牌：字段逐一比对，MAC使用常时比较
+        key = _store_key(token.dev_id)
+        cached = self._verified_tokens.get(key)
+        if (cached is not None
+                and cached[0] == token.t_start
+                and cached[1] == token.t_expire
+                and cached[2] == token.policy
+                and constant_time_compare(cached[3], token.mac)):
+            logger.info("✓✓✓ TokenFast verification passed (cached)")
+            return True
 
         # 重新计算MAC
-        policy_bytes = token.policy.encode('utf-8')
-        msg = (
-            token.dev_id +
-            struct.pack('<I', token.t_start) +
-            struct.pack('<I', token.t_expire) +
-            policy_bytes
-        )
+        # 验证路径只读缓存，避免外部构造的策略串撑大缓存
+        policy_bytes = self._policy_cache.get(token.policy)
+        if policy_bytes is None:
+            policy_bytes = token.policy.encode('utf-8')
+        msg = self._pack_mac_message(token.dev_id, token.t_start, token.t_expire, policy_bytes)
 
         expected_mac = compute_mac(
             key=self.k_mgmt,
@@ -157,17 +203,77 @@ class TokenFastManager:
             length=16
         )
 
-        logger.debug(f"  Expected MAC: {format_bytes_preview(expected_mac, 16)}")
-        logger.debug(f"  Received MAC: {format_bytes_preview(token.mac, 16)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("  Expected MAC: %s", format_bytes_preview(expected_mac, 16))
+            logger.debug("  Received MAC: %s", format_bytes_preview(token.mac, 16))
 
         # 常时比较
         if not constant_time_compare(expected_mac, token.mac):
-            logger.error(f"✗ MAC verification failed")
+            logger.error("✗ MAC verification failed")
             return False
 
-        logger.info(f"✓✓✓ TokenFast verification passed")
+        self._verified_tokens[key] = (token.t_start, token.t_expire, token.policy, token.mac)
+
+        logger.info("✓✓✓ TokenFast verification passed")
         return True
 
+    def verify_many(
+        self,
+        tokens: List[TokenFast],
+        current_time: Optional[int] = None
+    ) -> List[bool]:
+        """批量验证快速令牌
+
+        整批共享同一个验证时间点，结果与逐个调用verify_token_fast一致。
+
+        Args:
+            tokens: 待验证的令牌列表
+            current_time: 当前时间（Unix时间戳），None表示使用系统时间
+
+        Returns:
+            List[bool]: 与tokens一一对应的验证结果
+        """
+        if current_time is None:
+            current_time = int(time.time())
+
+        verify = self.verify_token_fast
+        return [verify(token, current_time) for token in tokens]
+
+    def _encode_policy(self, policy: str) -> bytes:
+        """获取策略标识的UTF-8编码（签发时写入缓存）
+
+        Args:
+            policy: 策略标识
+
+        Returns:
+            bytes: 编码后的策略标识
+        """
+        policy_bytes = self._policy_cache.get(policy)
+        if policy_bytes is None:
+            policy_bytes = policy.encode('utf-8')
+            self._policy_cache[policy] = policy_bytes
+        return policy_bytes
+
+    def _pack_mac_message(
+        self,
+        dev_id: bytes,
+        t_start: int,
+        t_expire: int,
+        policy_bytes: bytes
+    ) -> bytes:
+        """拼接 dev_id || t_start || t_expire || policy
+
+        Args:
+            dev_id: 设备标识（6字节）
+            t_start: 开始时间
+            t_expire: 过期时间
+            policy_bytes: 编码后的策略标识
+
+        Returns:
+            bytes: MAC消息
+        """
+        return _TF_STRUCT.pack(dev_id, t_start, t_expire) + policy_bytes
+
     def revoke_token(self, dev_id: bytes) -> bool:
         """撤销令牌
 
@@ -177,12 +283,18 @@ class TokenFastManager:
         Returns:
             bool: 是否成功撤销
         """
-        if dev_id in self._token_store:
-            del self._token_store[dev_id]
-            logger.info(f"TokenFast revoked for device {dev_id.hex()}")
+        if len(dev_id) != 6:
+            logger.warning("Invalid dev_id length: %d", len(dev_id))
+            return False
+
+        key = _store_key(dev_id)
+        self._verified_tokens.pop(key, None)
+        if key in self._token_store:
+            del self._token_store[key]
+            logger.info("TokenFast revoked for device %s", dev_id.hex())
             return True
         else:
-            logger.warning(f"No TokenFast found for device {dev_id.hex()}")
+            logger.warning("No TokenFast found for device %s", dev_id.hex())
             return False
 
 
@@ -214,10 +326,21 @@ class MATManager:
         self.issuer_id = issuer_id
         self.issuer_key = issuer_key
 
-        # MAT存储：mat_id -> (MAT, issue_time)
-        self._mat_store: Dict[bytes, Tuple[MAT, int]] = {}
+        # 签名函数：签发者与密钥在构造时固定，绑定为闭包局部变量
+        self._sign_mat = self._make_signer()
+
+        # MAT存储：int(mat_id) -> (MAT, issue_time)
+        self._mat_store: Dict[int, Tuple[MAT, int]] = {}
 
-        logger.info(f"MATManager initialized for issuer {issuer_id.hex()}")
+        # 过期时间SoA索引（与_mat_store并行），供cleanup_expired_mats向量化扫描
+        # 前_expiry_count项有效；已撤销的MAT在下次清理时一并压缩
+        # 追加与压缩均为读-改-写，由_expiry_lock串行化
+        self._expire_times = np.empty(64, dtype=np.int64)
+        self._expire_keys = np.empty(64, dtype=object)
+        self._expiry_count = 0
+        self._expiry_lock = threading.Lock()
+
+        logger.info("MATManager initialized for issuer %s", issuer_id.hex())
 
     def issue_mat(
         self,
@@ -236,9 +359,10 @@ class MATManager:
         Raises:
             ValueError: 参数无效
         """
-        logger.info(f"=" * 60)
-        logger.info(f"Issuing MAT for device pseudo={format_bytes_preview(dev_pseudo, 24)}")
-        logger.debug(f"  Epoch: {epoch}, TTL: {self.config.MAT_TTL}s")
+        logger.info(_BANNER)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Issuing MAT for device pseudo=%s", format_bytes_preview(dev_pseudo, 24))
+        logger.debug("  Epoch: %s, TTL: %ss", epoch, self.config.MAT_TTL)
 
         if len(dev_pseudo) != 12:
             raise ValueError(f"dev_pseudo must be 12 bytes, got {len(dev_pseudo)}")
@@ -247,29 +371,18 @@ class MATManager:
             raise ValueError(f"epoch must be in [0, 2^32-1], got {epoch}")
 
         # 生成唯一MAT ID
-        mat_id = secrets.token_bytes(16)
-        logger.debug(f"  MAT ID: {format_bytes_preview(mat_id, 32)}")
+        mat_id = pooled_random_bytes(16)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("  MAT ID: %s", format_bytes_preview(mat_id, 32))
 
         # 计算签名
         # signature = MAC(issuer_key, issuer_id || dev_pseudo || epoch || ttl || mat_id)
-        msg = (
-            self.issuer_id +
-            dev_pseudo +
-            struct.pack('<I', epoch) +
-            struct.pack('<I', self.config.MAT_TTL) +
-            mat_id
-        )
-
-        logger.debug(f"  Signing message of {len(msg)} bytes")
+        logger.debug("  Signing message of %d bytes", _MAT_STRUCT.size)
 
-        signature = compute_mac(
-            key=self.issuer_key,
-            data=msg,
-            algorithm=self.config.MAC_ALGORITHM,
-            length=32
-        )
+        signature = self._sign_mat(dev_pseudo, epoch, self.config.MAT_TTL, mat_id)
 
-        logger.debug(f"  Signature: {format_bytes_preview(signature, 32)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("  Signature: %s", format_bytes_preview(signature, 32))
 
         # 创建MAT
         mat = MAT(
@@ -283,10 +396,13 @@ class MATManager:
 
         # 存储MAT
         issue_time = int(time.time())
-        self._mat_store[mat_id] = (mat, issue_time)
+        key = _store_key(mat_id)
+        self._mat_store[key] = (mat, issue_time)
+        self._track_expiry(key, issue_time + mat.ttl)
 
-        logger.info(f"✓ MAT issued: ID={format_bytes_preview(mat_id, 16)}, TTL={self.config.MAT_TTL}s")
-        logger.info(f"=" * 60)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("✓ MAT issued: ID=%s, TTL=%ss", format_bytes_preview(mat_id, 16), self.config.MAT_TTL)
+        logger.info(_BANNER)
 
         return mat
 
@@ -304,28 +420,38 @@ class MATManager:
         Returns:
             bool: 是否验证通过
         """
-        logger.info(f"=" * 60)
-        logger.info(f"Verifying MAT: ID={format_bytes_preview(mat.mat_id, 16)}")
-        logger.debug(f"  Dev pseudo: {format_bytes_preview(mat.dev_pseudo, 24)}")
-        logger.debug(f"  Epoch: {mat.epoch}, TTL: {mat.ttl}s")
+        logger.info(_BANNER)
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Verifying MAT: ID=%s", format_bytes_preview(mat.mat_id, 16))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("  Dev pseudo: %s", format_bytes_preview(mat.dev_pseudo, 24))
+            logger.debug("  Epoch: %s, TTL: %ss", mat.epoch, mat.ttl)
 
         # 检查签发者
         if mat.issuer != self.issuer_id:
-            logger.warning(f"✗ Issuer mismatch")
-            logger.debug(f"  Expected: {self.issuer_id.hex()}")
-            logger.debug(f"  Got: {mat.issuer.hex()}")
+            logger.warning("✗ Issuer mismatch")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("  Expected: %s", self.issuer_id.hex())
+                logger.debug("  Got: %s", mat.issuer.hex())
             return False
 
-        logger.debug(f"✓ Issuer check passed")
+        logger.debug("✓ Issuer check passed")
+
+        # 签名消息按定长字段打包，长度不符的字段会被填充或截断
+        if len(mat.dev_pseudo) != 12 or len(mat.mat_id) != 16:
+            logger.warning("✗ Invalid field length (dev_pseudo=%d, mat_id=%d)",
+                           len(mat.dev_pseudo), len(mat.mat_id))
+            return False
 
         # 检查是否在存储中
-        if mat.mat_id not in self._mat_store:
-            logger.warning(f"✗ MAT not found in store (unknown or revoked)")
+        entry = self._mat_store.get(_store_key(mat.mat_id))
+        if entry is None:
+            logger.warning("✗ MAT not found in store (unknown or revoked)")
             return False
 
-        stored_mat, issue_time = self._mat_store[mat.mat_id]
+        stored_mat, issue_time = entry
 
-        logger.debug(f"✓ MAT found in store, issued at {issue_time}")
+        logger.debug("✓ MAT found in store, issued at %s", issue_time)
 
         # 检查过期
         if current_time is None:
@@ -333,43 +459,94 @@ class MATManager:
 
         expire_time = issue_time + mat.ttl
 
-        logger.debug(f"  Current: {current_time}, Expire: {expire_time}")
+        logger.debug("  Current: %s, Expire: %s", current_time, expire_time)
 
         if current_time > expire_time:
-            logger.warning(f"✗ MAT expired (current={current_time}, expire={expire_time})")
+            logger.warning("✗ MAT expired (current=%s, expire=%s)", current_time, expire_time)
             return False
 
-        logger.debug(f"✓ Time check passed")
+        logger.debug("✓ Time check passed")
 
         # 重新计算签名
-        msg = (
-            mat.issuer +
-            mat.dev_pseudo +
-            struct.pack('<I', mat.epoch) +
-            struct.pack('<I', mat.ttl) +
-            mat.mat_id
-        )
+        # 签发者已在上面检查，与签名函数绑定的issuer_id一致
+        expected_signature = self._sign_mat(mat.dev_pseudo, mat.epoch, mat.ttl, mat.mat_id)
 
-        expected_signature = compute_mac(
-            key=self.issuer_key,
-            data=msg,
-            algorithm=self.config.MAC_ALGORITHM,
-            length=32
-        )
-
-        logger.debug(f"  Expected signature: {format_bytes_preview(expected_signature, 32)}")
-        logger.debug(f"  Received signature: {format_bytes_preview(mat.signature, 32)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("  Expected signature: %s", format_bytes_preview(expected_signature, 32))
+            logger.debug("  Received signature: %s", format_bytes_preview(mat.signature, 32))
 
         # 常时比较
         if not constant_time_compare(expected_signature, mat.signature):
-            logger.error(f"✗ Signature verification failed")
+            logger.error("✗ Signature verification failed")
             return False
 
-        logger.info(f"✓✓✓ MAT verification passed")
-        logger.info(f"=" * 60)
+        logger.info("✓✓✓ MAT verification passed")
+        logger.info(_BANNER)
 
         return True
 
+    def _make_signer(self):
+        """构造针对本签发者特化的签名函数
+
+        signature = MAC(issuer_key, issuer_id || dev_pseudo || epoch || ttl || mat_id)
+
+        Returns:
+            Callable[[bytes, int, int, bytes], bytes]: 签名函数
+        """
+        pack = _MAT_STRUCT.pack
+        issuer_id = self.issuer_id
+        issuer_key = self.issuer_key
+        algorithm = self.config.MAC_ALGORITHM
+
+        def sign(dev_pseudo: bytes, epoch: int, ttl: int, mat_id: bytes) -> bytes:
+            return compute_mac(
+                key=issuer_key,
+                data=pack(issuer_id, dev_pseudo, epoch, ttl, mat_id),
+                algorithm=algorithm,
+                length=32
+            )
+
+        return sign
+
+    def verify_many(
+        self,
+        mats: List[MAT],
+        current_time: Optional[int] = None
+    ) -> List[bool]:
+        """批量验证准入令牌
+
+        整批共享同一个验证时间点，结果与逐个调用verify_mat一致。
+
+        Args:
+            mats: 待验证的MAT列表
+            current_time: 当前时间（Unix时间戳），None表示使用系统时间
+
+        Returns:
+            List[bool]: 与mats一一对应的验证结果
+        """
+        if current_time is None:
+            current_time = int(time.time())
+
+        verify = self.verify_mat
+        return [verify(mat, current_time) for mat in mats]
+
+    def _track_expiry(self, key: int, expire_time: int):
+        """将MAT过期时间追加到SoA索引（容量不足时倍增）
+
+        Args:
+            key: MAT存储键
+            expire_time: 过期时间（Unix时间戳）
+        """
+        with self._expiry_lock:
+            n = self._expiry_count
+            if n == len(self._expire_times):
+                self._expire_times = np.resize(self._expire_times, 2 * n)
+                self._expire_keys = np.resize(self._expire_keys, 2 * n)
+
+            self._expire_times[n] = expire_time
+            self._expire_keys[n] = key
+            self._expiry_count = n + 1
+
     def revoke_mat(self, mat_id: bytes) -> bool:
         """撤销MAT
 
@@ -379,12 +556,17 @@ class MATManager:
         Returns:
             bool: 是否成功撤销
         """
-        if mat_id in self._mat_store:
-            del self._mat_store[mat_id]
-            logger.info(f"MAT revoked: {format_bytes_preview(mat_id, 16)}")
+        if len(mat_id) != 16:
+            logger.warning("Invalid mat_id length: %d", len(mat_id))
+            return False
+
+        key = _store_key(mat_id)
+        if key in self._mat_store:
+            del self._mat_store[key]
+            logger.info("MAT revoked: %s", format_bytes_preview(mat_id, 16))
             return True
         else:
-            logger.warning(f"No MAT found for ID {format_bytes_preview(mat_id, 16)}")
+            logger.warning("No MAT found for ID %s", format_bytes_preview(mat_id, 16))
             return False
 
     def cleanup_expired_mats(self, current_time: Optional[int] = None) -> int:
@@ -399,20 +581,29 @@ class MATManager:
         if current_time is None:
             current_time = int(time.time())
 
-        logger.info(f"Cleaning up expired MATs (current_time={current_time})")
+        logger.info("Cleaning up expired MATs (current_time=%s)", current_time)
+
+        with self._expiry_lock:
+            n = self._expiry_count
+            expired = self._expire_times[:n] < current_time
 
-        expired_ids = []
-        for mat_id, (mat, issue_time) in self._mat_store.items():
-            expire_time = issue_time + mat.ttl
-            if current_time > expire_time:
-                expired_ids.append(mat_id)
+            removed = 0
+            for key in self._expire_keys[:n][expired]:
+                # 已撤销的MAT不在存储中，只需从索引中压缩掉
+                if self._mat_store.pop(key, None) is not None:
+                    removed += 1
 
-        for mat_id in expired_ids:
-            del self._mat_store[mat_id]
+            # 压缩索引，保留未过期项
+            keep = ~expired
+            kept = int(np.count_nonzero(keep))
+            self._expire_times[:kept] = self._expire_times[:n][keep]
+            self._expire_keys[:kept] = self._expire_keys[:n][keep]
+            self._expire_keys[kept:n] = None
+            self._expiry_count = kept
 
-        logger.info(f"Cleaned up {len(expired_ids)} expired MATs")
+        logger.info("Cleaned up %d expired MATs", removed)
 
-        return len(expired_ids)
+        return removed
 
 
 # 导出
@@ -6,7 +6,9 @@
 
 import hashlib
 import hmac
+import os
 import secrets
+import threading
 from typing import Optional
 import logging
 
@@ -73,7 +75,7 @@ def hash_data(data: bytes, algorithm: str = 'blake3', length: Optional[int] = No
     Raises:
         ValueError: 算法不支持
     """
-    logger.debug(f"Hashing {len(data)} bytes with {algorithm}")
+    logger.debug("Hashing %d bytes with %s", len(data), algorithm)
 
     if algorithm == 'blake3':
         if not BLAKE3_AVAILABLE:
@@ -82,7 +84,7 @@ def hash_data(data: bytes, algorithm: str = 'blake3', length: Optional[int] = No
         return blake3_hash(data, length)
     elif algorithm == 'sha256':
         if length is not None and length != 32:
-            logger.warning(f"SHA256 always outputs 32 bytes, ignoring length={length}")
+            logger.warning("SHA256 always outputs 32 bytes, ignoring length=%s", length)
         return sha256_hash(data)
     else:
         raise ValueError(f"Unsupported hash algorithm: {algorithm}")
@@ -127,8 +129,13 @@ def hmac_sha256_mac(key: bytes, data: bytes) -> bytes:
 
     Returns:
         bytes: MAC值（32字节）
+
+    Note:
+        使用 hmac.digest 单次调用接口，直接走 OpenSSL 的 HMAC 实现
+        （OpenSSL 在支持的 CPU 上自动启用 SHA-NI 等硬件加速），
+        避免创建 HMAC 对象的开销。
     """
-    return hmac.new(key, data, hashlib.sha256).digest()
+    return hmac.digest(key, data, 'sha256')
 
 
 def compute_mac(key: bytes, data: bytes, algorithm: str = 'blake3', length: Optional[int] = None) -> bytes:
@@ -146,7 +153,7 @@ def compute_mac(key: bytes, data: bytes, algorithm: str = 'blake3', length: Opti
     Raises:
         ValueError: 算法不支持
     """
-    logger.debug(f"Computing MAC for {len(data)} bytes with {algorithm}")
+    logger.debug("Computing MAC for %d bytes with %s", len(data), algorithm)
 
     if algorithm == 'blake3':
         if not BLAKE3_AVAILABLE:
@@ -161,7 +168,7 @@ def compute_mac(key: bytes, data: bytes, algorithm: str = 'blake3', length: Opti
         mac = hmac_sha256_mac(key, data)
         # 如果指定了length，截断结果
         if length is not None and length != 32:
-            logger.debug(f"HMAC-SHA256 outputs 32 bytes, truncating to {length} bytes")
+            logger.debug("HMAC-SHA256 outputs 32 bytes, truncating to %s bytes", length)
             return truncate(mac, length)
         return mac
     else:
@@ -189,6 +196,28 @@ def truncate(data: bytes, length: int) -> bytes:
     return data[:length]
 
 
+def truncate_view(data: bytes, length: int) -> memoryview:
+    """截断到指定长度（零拷贝）
+
+    返回原数据的memoryview切片，适用于仅用于比较（如secrets.compare_digest）
+    而无需持有新bytes对象的场景。
+
+    Args:
+        data: 输入数据
+        length: 目标长度（字节）
+
+    Returns:
+        memoryview: 截断后的数据视图
+
+    Raises:
+        ValueError: 数据长度不足
+    """
+    if len(data) < length:
+        raise ValueError(f"Data length {len(data)} < required length {length}")
+
+    return memoryview(data)[:length]
+
+
 # ==================== 比较函数 ====================
 
 def constant_time_compare(a: bytes, b: bytes) -> bool:
@@ -202,14 +231,9 @@ def constant_time_compare(a: bytes, b: bytes) -> bool:
         bool: 是否相等
 
     Note:
-        使用Python内置的secrets.compare_digest，提供常时比较。
+        直接使用Python内置的secrets.compare_digest（C实现的常时比较）。
+        长度不同时compare_digest本身返回False，无需额外的Python层长度预检。
     """
-    if len(a) != len(b):
-        # 长度不同时也要做常时比较，避免泄露长度信息
-        # 但Python的secrets.compare_digest会立即返回False
-        # 我们仍然使用它，因为这是推荐做法
-        return False
-
     return secrets.compare_digest(a, b)
 
 
@@ -227,6 +251,48 @@ def generate_nonce(length: int = 16) -> bytes:
     return secrets.token_bytes(length)
 
 
+# 池化随机数：每线程一次从内核CSPRNG读取一块，按需切片，
+# 减少高频签发（如MAT）时每次调用的getrandom系统调用
+_RANDOM_POOL_SIZE = 4096
+_random_pool = threading.local()
+
+
+def _reset_random_pool():
+    """丢弃当前线程的随机数池（fork后子进程不得复用父进程的池）"""
+    global _random_pool
+    _random_pool = threading.local()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_random_pool)
+
+
+def pooled_random_bytes(length: int) -> bytes:
+    """从池化缓冲区获取随机字节
+
+    缓冲区内容来自 os.urandom，安全性与 secrets.token_bytes 相同，
+    每段字节只会被返回一次。
+
+    Args:
+        length: 字节数
+
+    Returns:
+        bytes: 随机字节
+    """
+    if length > _RANDOM_POOL_SIZE:
+        return os.urandom(length)
+
+    pool = getattr(_random_pool, 'buf', None)
+    offset = getattr(_random_pool, 'offset', 0)
+    if pool is None or offset + length > len(pool):
+        pool = os.urandom(_RANDOM_POOL_SIZE)
+        offset = 0
+        _random_pool.buf = pool
+
+    _random_pool.offset = offset + length
+    return pool[offset:offset + length]
+
+
 def generate_random_key(length: int = 32) -> bytes:
     """生成随机密钥
 
@@ -286,11 +352,12 @@ def format_bytes_preview(data: bytes, max_len: int = 20) -> str:
     Returns:
         str: 格式化的预览字符串
     """
-    hex_str = data.hex()
-    if len(hex_str) > max_len:
-        return f"{hex_str[:max_len]}... ({len(data)} bytes)"
+    if 2 * len(data) > max_len:
+        # 只编码需要显示的前缀字节，避免对整段数据做十六进制编码
+        head = memoryview(data)[:(max_len + 1) // 2].hex()[:max_len]
+        return f"{head}... ({len(data)} bytes)"
     else:
-        return f"{hex_str} ({len(data)} bytes)"
+        return f"{data.hex()} ({len(data)} bytes)"
 
 
 def log_key_material(key_name: str, key_data: bytes, logger_obj: logging.Logger):
@@ -314,9 +381,11 @@ __all__ = [
     'hmac_sha256_mac',
     'compute_mac',
     'truncate',
+    'truncate_view',
     'constant_time_compare',
     'generate_nonce',
     'generate_random_key',
+    'pooled_random_bytes',
     'bytes_to_hex',
     'hex_to_bytes',
     'format_bytes_preview',
@@ -5,8 +5,9 @@
 """
 
 import sys
-import secrets
 import logging
+import traceback
+from functools import lru_cache
 import numpy as np
 from pathlib import Path
 
@@ -17,6 +18,8 @@ from src.config import AuthConfig
 from src.common import AuthContext
 from src.mode1_rff_auth import Mode1FastAuth
 from src.mode2_strong_auth import DeviceSide, VerifierSide
+from src._fe_bridge import FeatureEncryption, FEConfig
+from src.utils import pooled_random_bytes
 
 # 配置日志
 logging.basicConfig(
@@ -26,23 +29,41 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# 测试用常量（模块导入时解析一次）
+ISSUER_ID = bytes.fromhex('AABBCCDDEEFF')
+
 
 # 🔧 TEST WORKAROUND for deterministic quantizer
 def deterministic_random_bits(n: int):
     """Generate deterministic bits for testing."""
-    return [i % 2 for i in range(n)]
+    return (np.arange(n) & 1).tolist()
 
 
-def simulate_csi_features(base_seed=42, noise_level=0.1, M=6, D=64):
-    """模拟CSI特征"""
-    np.random.seed(base_seed)
-    base_feature = np.random.randn(D)
-    
-    Z_frames = np.zeros((M, D))
-    for m in range(M):
-        noise = np.random.randn(D) * noise_level
-        Z_frames[m] = base_feature + noise
-    
+@lru_cache(maxsize=None)
+def get_shared_fe():
+    """构造一次共享的FE实例（已打确定性补丁），供所有模式二测试复用
+
+    各测试使用不同的设备ID，共享实例内的辅助数据互不干扰。
+
+    Returns:
+        (FEConfig, FeatureEncryption)
+    """
+    shared_fe_config = FEConfig()
+    shared_fe = FeatureEncryption(shared_fe_config)
+    # 🔧 Apply deterministic workaround
+    shared_fe.quantizer._generate_secure_random_bits = staticmethod(deterministic_random_bits)
+    return shared_fe_config, shared_fe
+
+
+@lru_cache(maxsize=8)
+def simulate_csi_features(base_seed: int = 42, noise_level: float = 0.1,
+                          M: int = 6, D: int = 64) -> np.ndarray:
+    """模拟CSI特征（按参数缓存，返回只读数组，调用方不得原地修改）"""
+    rng = np.random.default_rng(base_seed)
+    base_feature = rng.standard_normal(D)
+    Z_frames = base_feature + rng.standard_normal((M, D)) * noise_level
+    
+    Z_frames.setflags(write=False)
     return Z_frames
 
 
@@ -63,8 +84,8 @@ def test_mode1_then_mode2_success():
     
     # 设备信息
     dev_id = bytes.fromhex('001122334455')
-    issuer_id = bytes.fromhex('AABBCCDDEEFF')
-    issuer_key = secrets.token_bytes(32)
+    issuer_id = ISSUER_ID
+    issuer_key = pooled_random_bytes(32)
     
     # ====== 阶段一：快速认证（模式一）======
     logger.info("\n" + "="*60)
@@ -74,7 +95,7 @@ def test_mode1_then_mode2_success():
     mode1_auth = Mode1FastAuth(config)
     
     # 注册设备到模式一
-    rff_template = secrets.token_bytes(64)
+    rff_template = pooled_random_bytes(64)
     mode1_auth.register_device(dev_id, rff_template)
     
     # 执行快速认证
@@ -94,13 +115,7 @@ def test_mode1_then_mode2_success():
     logger.info("="*60)
     
     # 初始化模式二
-    from src._fe_bridge import FeatureEncryption, FEConfig
-    
-    shared_fe_config = FEConfig()
-    shared_fe = FeatureEncryption(shared_fe_config)
-    
-    # 🔧 Apply deterministic workaround
-    shared_fe.quantizer._generate_secure_random_bits = staticmethod(deterministic_random_bits)
+    shared_fe_config, shared_fe = get_shared_fe()
     
     device = DeviceSide(config, fe_config=shared_fe_config)
     device.fe = shared_fe
@@ -109,7 +124,7 @@ def test_mode1_then_mode2_success():
     verifier.fe = shared_fe
     
     # 准备上下文
-    nonce = secrets.token_bytes(16)
+    nonce = pooled_random_bytes(16)
     context = AuthContext(
         src_mac=dev_id,
         dst_mac=issuer_id,
@@ -168,8 +183,8 @@ def test_mode1_fail_fallback_mode2():
     )
     
     dev_id = bytes.fromhex('112233445566')
-    issuer_id = bytes.fromhex('AABBCCDDEEFF')
-    issuer_key = secrets.token_bytes(32)
+    issuer_id = ISSUER_ID
+    issuer_key = pooled_random_bytes(32)
     
     # ====== 阶段一：快速认证失败 ======
     logger.info("\n" + "="*60)
@@ -179,11 +194,11 @@ def test_mode1_fail_fallback_mode2():
     mode1_auth = Mode1FastAuth(config)
     
     # 注册设备
-    rff_template = secrets.token_bytes(64)
+    rff_template = pooled_random_bytes(64)
     mode1_auth.register_device(dev_id, rff_template)
     
     # 使用不匹配的特征（会导致低分）
-    observed_features = secrets.token_bytes(64)
+    observed_features = pooled_random_bytes(64)
     result_mode1 = mode1_auth.authenticate(dev_id, observed_features, snr=25.0)
     
     if result_mode1.success:
@@ -199,11 +214,7 @@ def test_mode1_fail_fallback_mode2():
     logger.info("="*60)
     
     # 初始化模式二
-    from src._fe_bridge import FeatureEncryption, FEConfig
-    
-    shared_fe_config = FEConfig()
-    shared_fe = FeatureEncryption(shared_fe_config)
-    shared_fe.quantizer._generate_secure_random_bits = staticmethod(deterministic_random_bits)
+    shared_fe_config, shared_fe = get_shared_fe()
     
     device = DeviceSide(config, fe_config=shared_fe_config)
     device.fe = shared_fe
@@ -212,7 +223,7 @@ def test_mode1_fail_fallback_mode2():
     verifier.fe = shared_fe
     
     # 准备上下文
-    nonce = secrets.token_bytes(16)
+    nonce = pooled_random_bytes(16)
     context = AuthContext(
         src_mac=dev_id,
         dst_mac=issuer_id,
@@ -265,7 +276,7 @@ def test_dual_mode_independent():
     dev_a = bytes.fromhex('AA1122334455')
     mode1_auth = Mode1FastAuth(config)
     
-    template_a = secrets.token_bytes(64)
+    template_a = pooled_random_bytes(64)
     mode1_auth.register_device(dev_a, template_a)
     
     result_a = mode1_auth.authenticate(dev_a, template_a, snr=25.0)
@@ -281,14 +292,10 @@ def test_dual_mode_independent():
     logger.info("="*60)
     
     dev_b = bytes.fromhex('BB1122334455')
-    issuer_id = bytes.fromhex('AABBCCDDEEFF')
-    issuer_key = secrets.token_bytes(32)
-    
-    from src._fe_bridge import FeatureEncryption, FEConfig
+    issuer_id = ISSUER_ID
+    issuer_key = pooled_random_bytes(32)
     
-    shared_fe_config = FEConfig()
-    shared_fe = FeatureEncryption(shared_fe_config)
-    shared_fe.quantizer._generate_secure_random_bits = staticmethod(deterministic_random_bits)
+    shared_fe_config, shared_fe = get_shared_fe()
     
     device_b = DeviceSide(config, fe_config=shared_fe_config)
     device_b.fe = shared_fe
@@ -296,7 +303,7 @@ def test_dual_mode_independent():
     verifier_b = VerifierSide(config, issuer_id, issuer_key, fe_config=shared_fe_config)
     verifier_b.fe = shared_fe
     
-    nonce_b = secrets.token_bytes(16)
+    nonce_b = pooled_random_bytes(16)
     context_b = AuthContext(
         src_mac=dev_b,
         dst_mac=issuer_id,
@@ -333,7 +340,7 @@ def test_dual_mode_independent():
     logger.info("="*80)
 
 
-def main():
+def main() -> int:
     """运行所有集成测试"""
     logger.info("\n")
     logger.info("="*80)
@@ -356,8 +363,7 @@ def main():
         except Exception as e:
             logger.error(f"\n[FAIL][FAIL][FAIL] TEST FAILED: {test_name}")
             logger.error(f"  Error: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.error("  Traceback:\n%s", traceback.format_exc())
             failed += 1
     
     logger.info("\n")
@@ -5,8 +5,8 @@
 """
 
 import sys
-import secrets
 import logging
+import traceback
 from pathlib import Path
 
 # 添加src到路径
@@ -15,6 +15,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from src.config import AuthConfig
 from src.mode1_rff_auth import Mode1FastAuth, RFFMatcher
 from src.common import TokenFast
+from src.utils import pooled_random_bytes
 
 # 配置日志
 logging.basicConfig(
@@ -45,10 +46,10 @@ def test_mode1_success():
     logger.info("PHASE 1: Device Registration")
     logger.info("="*60)
     
-    template_data = secrets.token_bytes(64)  # 模拟RFF模板
+    template_data = pooled_random_bytes(64)  # 模拟RFF模板
     auth.register_device(dev_id, template_data)
     
-    logger.info(f"[OK] Device {dev_id.hex()} registered")
+    logger.info("[OK] Device %s registered", dev_id.hex())
     
     # 执行认证（使用相同的特征数据模拟成功场景）
     logger.info("\n" + "="*60)
@@ -66,15 +67,15 @@ def test_mode1_success():
     logger.info("="*60)
     
     if result.success:
-        logger.info(f"[OK] Authentication successful")
-        logger.info(f"  Mode: {result.mode}")
-        logger.info(f"  Token size: {len(result.token)} bytes")
+        logger.info("[OK] Authentication successful")
+        logger.info("  Mode: %s", result.mode)
+        logger.info("  Token size: %d bytes", len(result.token))
         
         # 反序列化令牌
         token = TokenFast.deserialize(result.token)
-        logger.info(f"  Token device: {token.dev_id.hex()}")
-        logger.info(f"  Token policy: {token.policy}")
-        logger.info(f"  Token TTL: {token.t_expire - token.t_start}s")
+        logger.info("  Token device: %s", token.dev_id.hex())
+        logger.info("  Token policy: %s", token.policy)
+        logger.info("  Token TTL: %ss", token.t_expire - token.t_start)
         
         # 验证令牌
         logger.info("\n" + "="*60)
@@ -82,12 +83,22 @@ def test_mode1_success():
         logger.info("="*60)
         
         if auth.verify_token(token):
-            logger.info(f"[OK][OK][OK] Token verification passed!")
+            logger.info("[OK][OK][OK] Token verification passed!")
         else:
-            logger.error(f"[FAIL] Token verification failed")
+            logger.error("[FAIL] Token verification failed")
             raise AssertionError("Token verification should succeed")
+        
+        # 重复验证（命中已验证缓存）仍应通过，篡改MAC后应失败
+        if not auth.verify_token(token):
+            raise AssertionError("Repeated token verification should succeed")
+        
+        tampered = TokenFast.deserialize(result.token[:-16] + bytes(16))
+        if auth.verify_token(tampered):
+            raise AssertionError("Tampered token should fail verification")
+        
+        logger.info("[OK] Repeated and tampered verification behave correctly")
     else:
-        logger.error(f"[FAIL] Authentication failed: {result.reason}")
+        logger.error("[FAIL] Authentication failed: %s", result.reason)
         raise AssertionError(f"Authentication should succeed but failed: {result.reason}")
     
     logger.info("="*80)
@@ -105,22 +116,30 @@ def test_mode1_device_not_registered():
     config = AuthConfig(MODE1_ENABLED=True, MODE2_ENABLED=False)
     auth = Mode1FastAuth(config)
     
+    # 记录RFF匹配调用次数：未注册设备不应触发匹配
+    match_calls = []
+    original_match = auth.rff_matcher.match
+    auth.rff_matcher.match = lambda *args, **kwargs: match_calls.append(args) or original_match(*args, **kwargs)
+    
     # 尝试认证未注册的设备
     dev_id = bytes.fromhex('AABBCCDDEEFF')
-    observed_features = secrets.token_bytes(64)
+    observed_features = pooled_random_bytes(64)
     
-    logger.info(f"Attempting to authenticate unregistered device {dev_id.hex()}...")
+    logger.info("Attempting to authenticate unregistered device %s...", dev_id.hex())
     
     result = auth.authenticate(dev_id, observed_features)
     
     # 应该失败
     if not result.success and result.reason == "device_not_registered":
-        logger.info(f"[OK][OK][OK] TEST PASSED: Correctly rejected unregistered device")
-        logger.info(f"  Reason: {result.reason}")
+        logger.info("[OK][OK][OK] TEST PASSED: Correctly rejected unregistered device")
+        logger.info("  Reason: %s", result.reason)
     else:
-        logger.error(f"[FAIL] Should reject unregistered device")
+        logger.error("[FAIL] Should reject unregistered device")
         raise AssertionError("Unregistered device should be rejected")
     
+    if match_calls:
+        raise AssertionError("RFF matcher should not be invoked for unregistered device")
+    
     logger.info("="*80)
 
 
@@ -137,24 +156,24 @@ def test_mode1_rff_score_below_threshold():
     
     # 注册设备
     dev_id = bytes.fromhex('112233445566')
-    template_data = secrets.token_bytes(64)
+    template_data = pooled_random_bytes(64)
     auth.register_device(dev_id, template_data)
     
-    logger.info(f"Device {dev_id.hex()} registered with threshold={config.RFF_THRESHOLD}")
+    logger.info("Device %s registered with threshold=%s", dev_id.hex(), config.RFF_THRESHOLD)
     
     # 使用不同的特征数据（得分会较低）
-    observed_features = secrets.token_bytes(64)  # 随机数据，不匹配
+    observed_features = pooled_random_bytes(64)  # 随机数据，不匹配
     
-    logger.info(f"Attempting authentication with mismatched features...")
+    logger.info("Attempting authentication with mismatched features...")
     
     result = auth.authenticate(dev_id, observed_features)
     
     # 应该失败（得分低于阈值）
     if not result.success and (result.reason == "rff_score_below_threshold" or result.reason == "rff_failed"):
-        logger.info(f"[OK][OK][OK] TEST PASSED: Correctly rejected low RFF score")
-        logger.info(f"  Reason: {result.reason}")
+        logger.info("[OK][OK][OK] TEST PASSED: Correctly rejected low RFF score")
+        logger.info("  Reason: %s", result.reason)
     else:
-        logger.error(f"[FAIL] Should reject low RFF score")
+        logger.error("[FAIL] Should reject low RFF score")
         raise AssertionError("Low RFF score should be rejected")
     
     logger.info("="*80)
@@ -172,28 +191,28 @@ def test_mode1_low_snr():
     
     # 注册设备
     dev_id = bytes.fromhex('223344556677')
-    template_data = secrets.token_bytes(64)
+    template_data = pooled_random_bytes(64)
     auth.register_device(dev_id, template_data)
     
-    logger.info(f"Device {dev_id.hex()} registered")
+    logger.info("Device %s registered", dev_id.hex())
     
     # 使用相同特征但低SNR
     observed_features = template_data
     low_snr = 5.0  # 非常低的信噪比
     
-    logger.info(f"Attempting authentication with low SNR={low_snr} dB...")
+    logger.info("Attempting authentication with low SNR=%s dB...", low_snr)
     
     result = auth.authenticate(dev_id, observed_features, snr=low_snr)
     
     # 由于SNR因子降低，即使特征匹配，得分也会下降
     # 可能通过或失败，取决于具体实现
-    logger.info(f"Authentication result: success={result.success}")
+    logger.info("Authentication result: success=%s", result.success)
     if not result.success:
-        logger.info(f"  Reason: {result.reason}")
+        logger.info("  Reason: %s", result.reason)
     else:
-        logger.info(f"  Despite low SNR, authentication passed (features matched perfectly)")
+        logger.info("  Despite low SNR, authentication passed (features matched perfectly)")
     
-    logger.info(f"[OK][OK][OK] TEST PASSED: Low SNR scenario handled")
+    logger.info("[OK][OK][OK] TEST PASSED: Low SNR scenario handled")
     logger.info("="*80)
 
 
@@ -209,7 +228,7 @@ def test_mode1_token_revocation():
     
     # 注册设备
     dev_id = bytes.fromhex('334455667788')
-    template_data = secrets.token_bytes(64)
+    template_data = pooled_random_bytes(64)
     auth.register_device(dev_id, template_data)
     
     # 认证
@@ -219,33 +238,33 @@ def test_mode1_token_revocation():
         raise AssertionError("Initial authentication should succeed")
     
     token = TokenFast.deserialize(result.token)
-    logger.info(f"[OK] Token issued for device {dev_id.hex()}")
+    logger.info("[OK] Token issued for device %s", dev_id.hex())
     
     # 撤销设备
-    logger.info(f"Revoking device {dev_id.hex()}...")
+    logger.info("Revoking device %s...", dev_id.hex())
     revoked = auth.revoke_device(dev_id)
     
     if revoked:
-        logger.info(f"[OK] Device revoked")
+        logger.info("[OK] Device revoked")
         
         # 尝试再次认证（应该失败）
-        logger.info(f"Attempting re-authentication after revocation...")
+        logger.info("Attempting re-authentication after revocation...")
         result2 = auth.authenticate(dev_id, template_data, snr=25.0)
         
         if not result2.success:
-            logger.info(f"[OK][OK][OK] TEST PASSED: Re-authentication correctly rejected")
-            logger.info(f"  Reason: {result2.reason}")
+            logger.info("[OK][OK][OK] TEST PASSED: Re-authentication correctly rejected")
+            logger.info("  Reason: %s", result2.reason)
         else:
-            logger.error(f"[FAIL] Should reject revoked device")
+            logger.error("[FAIL] Should reject revoked device")
             raise AssertionError("Revoked device should be rejected")
     else:
-        logger.error(f"[FAIL] Failed to revoke device")
+        logger.error("[FAIL] Failed to revoke device")
         raise AssertionError("Device revocation failed")
     
     logger.info("="*80)
 
 
-def main():
+def main() -> int:
     """运行所有测试"""
     logger.info("\n")
     logger.info("="*80)
@@ -268,19 +287,18 @@ def main():
             test_func()
             passed += 1
         except Exception as e:
-            logger.error(f"\n[FAIL][FAIL][FAIL] TEST FAILED: {test_name}")
-            logger.error(f"  Error: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.error("\n[FAIL][FAIL][FAIL] TEST FAILED: %s", test_name)
+            logger.error("  Error: %s", e)
+            logger.error("  Traceback:\n%s", traceback.format_exc())
             failed += 1
     
     logger.info("\n")
     logger.info("="*80)
     logger.info("TEST SUMMARY")
     logger.info("="*80)
-    logger.info(f"Total: {len(tests)}")
-    logger.info(f"Passed: {passed}")
-    logger.info(f"Failed: {failed}")
+    logger.info("Total: %d", len(tests))
+    logger.info("Passed: %s", passed)
+    logger.info("Failed: %s", failed)
     
     if failed == 0:
         logger.info("\n[OK][OK][OK] ALL TESTS PASSED [OK][OK][OK]")
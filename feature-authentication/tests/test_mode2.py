@@ -5,8 +5,10 @@
 """
 
 import sys
-import secrets
 import logging
+import traceback
+import dataclasses
+from functools import lru_cache
 import numpy as np
 from pathlib import Path
 
@@ -16,6 +18,8 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from src.config import AuthConfig
 from src.common import AuthContext
 from src.mode2_strong_auth import DeviceSide, VerifierSide
+from src.utils import format_bytes_preview, pooled_random_bytes
+from src._fe_bridge import FeatureEncryption, FEConfig
 from typing import List
 
 # 配置日志
@@ -26,16 +30,56 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# 测试用常量（模块导入时解析一次）
+DEV_ID = bytes.fromhex('001122334455')
+ISSUER_ID = bytes.fromhex('AABBCCDDEEFF')
+
 
 # 🔧 TEST WORKAROUND for P-0: Deterministic padding function
 def deterministic_random_bits(n: int) -> List[int]:
     """Generate deterministic bits instead of random ones for testing."""
-    return [i % 2 for i in range(n)]
+    return (np.arange(n) & 1).tolist()
+
+
+@lru_cache(maxsize=None)
+def get_mode2_env():
+    """构造一次模式二测试环境，供各测试复用
+
+    设备端和验证端共享同一个FE实例以共享helper data，
+    实际部署中helper data会通过网络传输或共享存储。
+    各测试开始前应清空验证端的设备注册表。
+
+    Returns:
+        (config, issuer_id, device, verifier)
+    """
+    config = AuthConfig.default()
+    issuer_id = ISSUER_ID
+    issuer_key = pooled_random_bytes(32)
+
+    shared_fe_config = FEConfig()
+    shared_fe = FeatureEncryption(shared_fe_config)
+
+    # 🔧 TEST WORKAROUND for P-0: Monkey-patch with deterministic padding
+    # This avoids the random padding issue documented in P0_ROOT_CAUSE.md
+    # Production fix required in 3.1 module
+    shared_fe.quantizer._generate_secure_random_bits = staticmethod(deterministic_random_bits)
+
+    device = DeviceSide(config, fe_config=shared_fe_config)
+    device.fe = shared_fe  # 使用共享FE实例
+
+    verifier = VerifierSide(config, issuer_id, issuer_key, fe_config=shared_fe_config)
+    verifier.fe = shared_fe  # 使用共享FE实例
+
+    return config, issuer_id, device, verifier
 
 
-def simulate_csi_features(base_seed=42, noise_level=0.1, M=6, D=64):
+@lru_cache(maxsize=32)
+def simulate_csi_features(base_seed: int = 42, noise_level: float = 0.1,
+                          M: int = 6, D: int = 64) -> np.ndarray:
     """模拟CSI特征
 
+    结果按参数缓存，返回只读数组，调用方不得原地修改。
+
     Args:
         base_seed: 基础随机种子
         noise_level: 噪声水平
@@ -45,14 +89,11 @@ def simulate_csi_features(base_seed=42, noise_level=0.1, M=6, D=64):
     Returns:
         np.ndarray: M x D的特征矩阵
     """
-    np.random.seed(base_seed)
-    base_feature = np.random.randn(D)
-
-    Z_frames = np.zeros((M, D))
-    for m in range(M):
-        noise = np.random.randn(D) * noise_level
-        Z_frames[m] = base_feature + noise
+    rng = np.random.default_rng(base_seed)
+    base_feature = rng.standard_normal(D)
+    Z_frames = base_feature + rng.standard_normal((M, D)) * noise_level
 
+    Z_frames.setflags(write=False)
     return Z_frames
 
 
@@ -62,35 +103,15 @@ def test_mode2_success():
     logger.info("TEST: Mode2 Success Scenario")
     logger.info("="*80)
 
-    # 配置
-    config = AuthConfig.default()
-
     # 设备信息
-    dev_id = bytes.fromhex('001122334455')
-    issuer_id = bytes.fromhex('AABBCCDDEEFF')
-    issuer_key = secrets.token_bytes(32)
-
-    # 初始化设备端和验证端
-    # 为了测试，两端共享同一个FE实例以共享helper data
-    # 实际部署中helper data会通过网络传输或共享存储
-    from src._fe_bridge import FeatureEncryption, FEConfig
-
-    shared_fe_config = FEConfig()
-    shared_fe = FeatureEncryption(shared_fe_config)
-
-    # 🔧 TEST WORKAROUND for P-0: Monkey-patch with deterministic padding
-    # This avoids the random padding issue documented in P0_ROOT_CAUSE.md
-    # Production fix required in 3.1 module
-    shared_fe.quantizer._generate_secure_random_bits = staticmethod(deterministic_random_bits)
+    dev_id = DEV_ID
 
-    device = DeviceSide(config, fe_config=shared_fe_config)
-    device.fe = shared_fe  # 使用共享FE实例
-
-    verifier = VerifierSide(config, issuer_id, issuer_key, fe_config=shared_fe_config)
-    verifier.fe = shared_fe  # 使用共享FE实例
+    # 复用共享的设备端和验证端
+    config, issuer_id, device, verifier = get_mode2_env()
+    verifier.device_registry.clear()
 
     # 准备上下文
-    nonce = secrets.token_bytes(16)
+    nonce = pooled_random_bytes(16)
     context = AuthContext(
         src_mac=dev_id,
         dst_mac=issuer_id,
@@ -117,10 +138,10 @@ def test_mode2_success():
 
     auth_req, Ks_device, K_device = device.create_auth_request(dev_id, Z_frames_device, context)
 
-    logger.info(f"✓ AuthReq created")
-    logger.info(f"  Size: {len(auth_req.serialize())} bytes")
-    logger.info(f"  Ks (device): {Ks_device.hex()[:40]}...")
-    logger.info(f"  K (device): {K_device.hex()[:40]}...")
+    logger.info("✓ AuthReq created")
+    logger.info("  Size: %d bytes", len(auth_req.serialize()))
+    logger.info("  Ks (device): %s...", Ks_device[:20].hex())
+    logger.info("  K (device): %s...", K_device[:20].hex())
 
     # 验证端需要先注册设备（模拟）
     # 实际中应在设备注册时获取K
@@ -131,7 +152,7 @@ def test_mode2_success():
     # 使用从create_auth_request返回的K来注册设备
     # 这确保了验证端使用的K与设备生成DevPseudo时使用的K相同
     verifier.register_device(dev_id, K_device, context.epoch)
-    logger.info(f"✓ Device registered with K={K_device.hex()[:40]}...")
+    logger.info("✓ Device registered with K=%s...", K_device[:20].hex())
 
     # 验证端：验证AuthReq
     logger.info("\n" + "="*60)
@@ -145,25 +166,25 @@ def test_mode2_success():
     logger.info("PHASE 3: Verification Result")
     logger.info("="*60)
 
-    logger.info(f"Success: {result.success}")
-    logger.info(f"Mode: {result.mode}")
+    logger.info("Success: %s", result.success)
+    logger.info("Mode: %s", result.mode)
 
     if result.success:
-        logger.info(f"✓ Authentication successful")
-        logger.info(f"  Token size: {len(result.token)} bytes")
-        logger.info(f"  Ks (verifier): {result.session_key.hex()[:40]}...")
+        logger.info("✓ Authentication successful")
+        logger.info("  Token size: %d bytes", len(result.token))
+        logger.info("  Ks (verifier): %s...", result.session_key[:20].hex())
 
         # 验证会话密钥是否一致
         if result.session_key == Ks_device:
-            logger.info(f"✓✓✓ Session keys match! Authentication fully successful!")
+            logger.info("✓✓✓ Session keys match! Authentication fully successful!")
         else:
-            logger.error(f"✗ Session keys mismatch!")
-            logger.error(f"  Device:   {Ks_device.hex()}")
-            logger.error(f"  Verifier: {result.session_key.hex()}")
+            logger.error("✗ Session keys mismatch!")
+            logger.error("  Device:   %s", Ks_device.hex())
+            logger.error("  Verifier: %s", result.session_key.hex())
             raise AssertionError("Session key mismatch")
     else:
-        logger.error(f"✗ Authentication failed")
-        logger.error(f"  Reason: {result.reason}")
+        logger.error("✗ Authentication failed")
+        logger.error("  Reason: %s", result.reason)
         raise AssertionError(f"Authentication should succeed but failed: {result.reason}")
 
     logger.info("="*80)
@@ -171,34 +192,19 @@ def test_mode2_success():
     logger.info("="*80)
 
 
-def test_mode2_tag_mismatch():
-    """测试Tag不匹配的场景"""
-    logger.info("\n"*2)
-    logger.info("="*80)
-    logger.info("TEST: Mode2 Tag Mismatch Scenario")
-    logger.info("="*80)
-
-    config = AuthConfig.default()
-    dev_id = bytes.fromhex('001122334455')
-    issuer_id = bytes.fromhex('AABBCCDDEEFF')
-    issuer_key = secrets.token_bytes(32)
-
-    # 为了测试，两端共享同一个FE实例以共享helper data
-    from src._fe_bridge import FeatureEncryption, FEConfig
+@lru_cache(maxsize=None)
+def get_tamper_base():
+    """为篡改类测试只创建一次未篡改的AuthReq
 
-    shared_fe_config = FEConfig()
-    shared_fe = FeatureEncryption(shared_fe_config)
+    各篡改测试在其副本上修改单个字段，避免重复执行create_auth_request。
 
-    # 🔧 TEST WORKAROUND for P-0: Monkey-patch with deterministic padding
-    shared_fe.quantizer._generate_secure_random_bits = staticmethod(deterministic_random_bits)
-
-    device = DeviceSide(config, fe_config=shared_fe_config)
-    device.fe = shared_fe
-
-    verifier = VerifierSide(config, issuer_id, issuer_key, fe_config=shared_fe_config)
-    verifier.fe = shared_fe
+    Returns:
+        (dev_id, context, auth_req, K_device)
+    """
+    dev_id = DEV_ID
+    config, issuer_id, device, verifier = get_mode2_env()
 
-    nonce = secrets.token_bytes(16)
+    nonce = pooled_random_bytes(16)
     context = AuthContext(
         src_mac=dev_id,
         dst_mac=issuer_id,
@@ -211,30 +217,56 @@ def test_mode2_tag_mismatch():
     )
 
     Z_frames = simulate_csi_features(base_seed=100, noise_level=0)
-    Z_frames_device = Z_frames
-    Z_frames_verifier = Z_frames
 
     # 创建AuthReq
-    auth_req, Ks_device, K_device = device.create_auth_request(dev_id, Z_frames_device, context)
+    auth_req, Ks_device, K_device = device.create_auth_request(dev_id, Z_frames, context)
+
+    return dev_id, context, auth_req, K_device
 
-    # 篡改Tag
-    logger.info("Tampering with Tag...")
-    auth_req.tag = secrets.token_bytes(16)
-    logger.info(f"  New Tag: {auth_req.tag.hex()}")
+
+def run_tamper_case(field: str):
+    """篡改共享AuthReq副本的指定字段并交给验证端验证
+
+    Args:
+        field: 要篡改的字段名（'tag' 或 'digest'）
+
+    Returns:
+        AuthResult: 验证结果
+    """
+    dev_id, context, base_req, K_device = get_tamper_base()
+    config, issuer_id, device, verifier = get_mode2_env()
+    verifier.device_registry.clear()
+
+    # 在副本上篡改，保持共享请求不变
+    tampered = pooled_random_bytes(len(getattr(base_req, field)))
+    auth_req = dataclasses.replace(base_req, **{field: tampered})
+    logger.info("Tampering with %s...", field)
+    logger.info("  New %s: %s", field, format_bytes_preview(tampered, 40))
 
     # 注册设备
     verifier.register_device(dev_id, K_device, context.epoch)
 
     # 验证AuthReq（应该失败）
     logger.info("\nVerifying AuthReq (should fail)...")
-    result = verifier.verify_auth_request(auth_req, Z_frames_verifier)
+    Z_frames_verifier = simulate_csi_features(base_seed=100, noise_level=0)
+    return verifier.verify_auth_request(auth_req, Z_frames_verifier)
+
+
+def test_mode2_tag_mismatch():
+    """测试Tag不匹配的场景"""
+    logger.info("\n"*2)
+    logger.info("="*80)
+    logger.info("TEST: Mode2 Tag Mismatch Scenario")
+    logger.info("="*80)
+
+    result = run_tamper_case('tag')
 
     # 检查结果
     if not result.success and result.reason == "tag_mismatch":
-        logger.info(f"✓✓✓ TEST PASSED: Tag mismatch correctly detected")
-        logger.info(f"  Reason: {result.reason}")
+        logger.info("✓✓✓ TEST PASSED: Tag mismatch correctly detected")
+        logger.info("  Reason: %s", result.reason)
     else:
-        logger.error(f"✗ TEST FAILED: Should reject tampered Tag")
+        logger.error("✗ TEST FAILED: Should reject tampered Tag")
         raise AssertionError("Tag mismatch not detected")
 
     logger.info("="*80)
@@ -247,69 +279,20 @@ def test_mode2_digest_mismatch():
     logger.info("TEST: Mode2 Digest Mismatch Scenario")
     logger.info("="*80)
 
-    config = AuthConfig.default()
-    dev_id = bytes.fromhex('001122334455')
-    issuer_id = bytes.fromhex('AABBCCDDEEFF')
-    issuer_key = secrets.token_bytes(32)
-
-    # 为了测试，两端共享同一个FE实例以共享helper data
-    from src._fe_bridge import FeatureEncryption, FEConfig
-
-    shared_fe_config = FEConfig()
-    shared_fe = FeatureEncryption(shared_fe_config)
-
-    # 🔧 TEST WORKAROUND for P-0: Monkey-patch with deterministic padding
-    shared_fe.quantizer._generate_secure_random_bits = staticmethod(deterministic_random_bits)
-
-    device = DeviceSide(config, fe_config=shared_fe_config)
-    device.fe = shared_fe
-
-    verifier = VerifierSide(config, issuer_id, issuer_key, fe_config=shared_fe_config)
-    verifier.fe = shared_fe
-
-    nonce = secrets.token_bytes(16)
-    context = AuthContext(
-        src_mac=dev_id,
-        dst_mac=issuer_id,
-        epoch=12345,
-        nonce=nonce,
-        seq=1,
-        alg_id='FeatureAuth-v1',
-        ver=1,
-        csi_id=1
-    )
-
-    Z_frames = simulate_csi_features(base_seed=100, noise_level=0)
-    Z_frames_device = Z_frames
-    Z_frames_verifier = Z_frames
-
-    # 创建AuthReq
-    auth_req, Ks_device, K_device = device.create_auth_request(dev_id, Z_frames_device, context)
-
-    # 篡改digest
-    logger.info("Tampering with digest...")
-    auth_req.digest = secrets.token_bytes(32)
-    logger.info(f"  New digest: {auth_req.digest.hex()[:40]}...")
-
-    # 注册设备
-    verifier.register_device(dev_id, K_device, context.epoch)
-
-    # 验证AuthReq（应该失败）
-    logger.info("\nVerifying AuthReq (should fail)...")
-    result = verifier.verify_auth_request(auth_req, Z_frames_verifier)
+    result = run_tamper_case('digest')
 
     # 检查结果
     if not result.success and result.reason == "digest_mismatch":
-        logger.info(f"✓✓✓ TEST PASSED: Digest mismatch correctly detected")
-        logger.info(f"  Reason: {result.reason}")
+        logger.info("✓✓✓ TEST PASSED: Digest mismatch correctly detected")
+        logger.info("  Reason: %s", result.reason)
     else:
-        logger.error(f"✗ TEST FAILED: Should reject mismatched digest")
+        logger.error("✗ TEST FAILED: Should reject mismatched digest")
         raise AssertionError("Digest mismatch not detected")
 
     logger.info("="*80)
 
 
-def main():
+def main() -> int:
     """运行所有测试"""
     logger.info("\n")
     logger.info("="*80)
@@ -330,19 +313,18 @@ def main():
             test_func()
             passed += 1
         except Exception as e:
-            logger.error(f"\n✗✗✗ TEST FAILED: {test_name}")
-            logger.error(f"  Error: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.error("\n✗✗✗ TEST FAILED: %s", test_name)
+            logger.error("  Error: %s", e)
+            logger.error("  Traceback:\n%s", traceback.format_exc())
             failed += 1
 
     logger.info("\n")
     logger.info("="*80)
     logger.info("TEST SUMMARY")
     logger.info("="*80)
-    logger.info(f"Total: {len(tests)}")
-    logger.info(f"Passed: {passed}")
-    logger.info(f"Failed: {failed}")
+    logger.info("Total: %d", len(tests))
+    logger.info("Passed: %s", passed)
+    logger.info("Failed: %s", failed)
 
     if failed == 0:
         logger.info("\n✓✓✓ ALL TESTS PASSED ✓✓✓")
@@ -9,7 +9,7 @@ import json
 from dataclasses import dataclass, asdict
 
 
-@dataclass
+@dataclass(slots=True)
 class FeatureEncryptionConfig:
     """特征加密算法配置类"""
 
@@ -45,7 +45,7 @@ class FeatureEncryptionConfig:
     MAC_LENGTH: int = 6  # MAC地址长度（字节）
     EPOCH_LENGTH: int = 4  # 时间窗编号长度（字节）
     NONCE_LENGTH: int = 16  # 随机数长度（字节）
-    VERSION: int = 1  # 算法版本号
+    VERSION: int = 2  # 算法版本号（2: 二进制掩码+float32特征流水线，与版本1注册数据不兼容）
     HASH_CHAIN_COUNTER: int = 0  # 哈希链计数器Ci
 
     def validate(self) -> bool:
@@ -204,10 +204,11 @@ class FeatureEncryptionConfig:
         Returns:
             int: 特征维度
         """
-        if mode.upper() == 'CSI':
+        mode_upper = mode.upper()
+        if mode_upper == 'CSI':
             # CSI模式：(N_selected - 1) * 2 (幅度差分 + 相位差分)
             return (self.N_SUBCARRIER_SELECTED - 1) * 2
-        elif mode.upper() == 'RFF':
+        elif mode_upper == 'RFF':
             return self.FEATURE_DIM_RFF
         else:
             raise ValueError(f"Unknown mode: {mode}, expected 'CSI' or 'RFF'")
@@ -13,9 +13,10 @@ from .feature_processor import FeatureProcessor
 from .quantizer import FeatureQuantizer
 from .fuzzy_extractor import FuzzyExtractor
 from .key_derivation import KeyDerivation
+from .helper_store import HelperStore, InMemoryHelperStore
 
 
-@dataclass
+@dataclass(slots=True)
 class Context:
     """上下文信息"""
     srcMAC: bytes  # 源MAC地址（6字节）
@@ -27,7 +28,7 @@ class Context:
     nonce: bytes  # 随机数（16字节）
 
 
-@dataclass
+@dataclass(slots=True)
 class KeyOutput:
     """密钥输出"""
     S: bytes  # 稳定特征串（32字节）
@@ -40,13 +41,19 @@ class KeyOutput:
 class FeatureEncryption:
     """特征加密算法主类"""
 
-    def __init__(self, config: FeatureEncryptionConfig = None, deterministic_for_testing: bool = False):
+    def __init__(
+        self,
+        config: FeatureEncryptionConfig = None,
+        deterministic_for_testing: bool = False,
+        helper_store: Optional[HelperStore] = None
+    ):
         """
         初始化特征加密算法
 
         Args:
             config: 算法配置，默认使用默认配置
             deterministic_for_testing: 是否启用测试模式（确定性随机填充），默认False
+            helper_store: 辅助数据与门限的存储后端，默认使用进程内字典存储
         """
         if config is None:
             config = FeatureEncryptionConfig()
@@ -62,10 +69,11 @@ class FeatureEncryption:
         self.fuzzy_extractor = FuzzyExtractor(config)
         self.key_derivation = KeyDerivation(config)
 
-        # 存储辅助数据（实际应用中应该存储在安全的数据库中）
-        self._helper_data_store: Dict[str, bytes] = {}
-        # 存储门限数据
-        self._threshold_store: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        # 模拟多帧采集用的随机数生成器（跨调用复用）
+        self._rng = np.random.default_rng()
+
+        # 辅助数据与门限存储（实际应用中应使用持久化后端，如LmdbHelperStore）
+        self.helper_store = helper_store if helper_store is not None else InMemoryHelperStore()
 
     def register(
         self,
@@ -224,11 +232,12 @@ class FeatureEncryption:
             Z, mask = self.feature_processor.process_feature(X, mode, **kwargs)
 
             # 模拟采集多帧（实际应用中应该真实采集）
-            Z_frames = np.tile(Z, (self.config.M_FRAMES, 1))
-
-            # 添加噪声模拟真实采集
-            noise = np.random.randn(*Z_frames.shape) * 0.1
-            Z_frames = Z_frames + noise
+            # 单精度噪声直接广播加到单帧特征上，不复制M份基准帧
+            noise = self._rng.standard_normal(
+                (self.config.M_FRAMES, Z.shape[-1]), dtype=np.float32
+            )
+            noise *= np.float32(0.1)
+            Z_frames = Z + noise
 
             mask_bytes = FeatureProcessor.serialize_mask(mask)
         else:
@@ -301,11 +310,11 @@ class FeatureEncryption:
 
     def _store_helper_data(self, device_id: str, P: bytes) -> None:
         """存储辅助数据"""
-        self._helper_data_store[device_id] = P
+        self.helper_store.put_helper_data(device_id, P)
 
     def _load_helper_data(self, device_id: str) -> Optional[bytes]:
         """加载辅助数据"""
-        return self._helper_data_store.get(device_id)
+        return self.helper_store.get_helper_data(device_id)
 
     def _store_thresholds(
         self,
@@ -314,14 +323,14 @@ class FeatureEncryption:
         theta_H: np.ndarray
     ) -> None:
         """存储量化门限"""
-        self._threshold_store[device_id] = (theta_L, theta_H)
+        self.helper_store.put_thresholds(device_id, theta_L, theta_H)
 
     def _load_thresholds(
         self,
         device_id: str
     ) -> Optional[Tuple[np.ndarray, np.ndarray]]:
         """加载量化门限"""
-        return self._threshold_store.get(device_id)
+        return self.helper_store.get_thresholds(device_id)
 
     def verify_digest(
         self,
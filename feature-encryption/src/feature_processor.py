@@ -7,10 +7,24 @@
 import numpy as np
 from typing import Tuple, List, Dict, Any
 import json
+import struct
 
 from .config import FeatureEncryptionConfig
 
 
+# 二进制掩码格式：首字节为格式版本，次字节为类型标记，其后为定长字段
+# CSI: ver + 'C' + N_selected(uint16) + noise_variance(float64) + indices(uint16[])
+# RFF: ver + 'R' + mean(float64[D]) + std(float64[D])
+# 其他结构的掩码及旧版注册数据仍使用JSON（以'{'开头，与版本字节不冲突）
+_MASK_FORMAT_VERSION = b'\x02'
+_MASK_TAG_CSI = b'C'
+_MASK_TAG_RFF = b'R'
+_MASK_PREFIX_LEN = 2
+_CSI_MASK_HEADER = struct.Struct('<ccHd')
+_CSI_MASK_KEYS = frozenset(('mode', 'indices', 'N_selected', 'noise_variance'))
+_RFF_MASK_KEYS = frozenset(('mode', 'feature_ids', 'mean', 'std'))
+
+
 class FeatureProcessor:
     """特征处理器"""
 
@@ -42,6 +56,9 @@ class FeatureProcessor:
         N_total = self.config.N_SUBCARRIER_TOTAL
         N_select = self.config.N_SUBCARRIER_SELECTED
 
+        # 特征最终只用于量化成比特，单精度足够，统一用complex64/float32计算
+        H = np.asarray(H, dtype=np.complex64)
+
         # 验证输入
         if H.shape[0] != N_total:
             raise ValueError(
@@ -49,33 +66,25 @@ class FeatureProcessor:
             )
 
         # Step 1: 计算SNR并选择子载波
-        snr = np.abs(H) ** 2 / (noise_variance + 1e-10)
-        indices = np.argsort(snr)[::-1][:N_select]  # SNR最高的N_select个
+        snr = self._subcarrier_snr(H, noise_variance)
+        indices = self._top_k_indices(snr, N_select)  # SNR最高的N_select个
         indices_sorted = np.sort(indices)  # 保持频域顺序
 
         # Step 2: 提取选中的子载波
         H_selected = H[indices_sorted]
 
-        # Step 3: 计算幅度差分特征 (N_select - 1维)
-        amp = np.abs(H_selected)
-        amp_diff = amp[1:] - amp[:-1]  # shape: (N_select-1,)
-
-        # Step 4: 计算相位差分特征 (N_select - 1维)
-        phase = np.angle(H_selected)
-        phase_diff = phase[1:] - phase[:-1]
-        # 相位展开到[-π, π]
-        phase_diff = np.mod(phase_diff + np.pi, 2 * np.pi) - np.pi
-
-        # Step 5: 拼接特征向量
-        Z = np.concatenate([amp_diff, phase_diff])  # shape: (2*(N_select-1),)
+        # Step 3-5: 幅度差分与相位差分 (各N_select - 1维) 直接写入预分配的特征向量
+        n_diff = H_selected.shape[0] - 1
+        target_dim = self.config.get_feature_dim('CSI')
+        n_stats = 2 if 2 * n_diff < target_dim else 0
+        Z = np.empty(2 * n_diff + n_stats, dtype=np.float32)  # shape: (2*(N_select-1) [+2],)
+        amp = self._fill_diff_features(H_selected, Z[:n_diff], Z[n_diff:2 * n_diff])
 
         # Step 6: 如果需要扩展到目标维度，补充统计特征
-        target_dim = self.config.get_feature_dim('CSI')
-        if Z.shape[0] < target_dim:
+        if n_stats:
             # 补充统计特征：均值和标准差
-            mean_amp = np.mean(amp)
-            std_amp = np.std(amp)
-            Z = np.concatenate([Z, [mean_amp, std_amp]])
+            Z[2 * n_diff] = np.mean(amp)
+            Z[2 * n_diff + 1] = np.std(amp)
 
         # 截断到目标维度
         Z = Z[:target_dim]
@@ -108,6 +117,8 @@ class FeatureProcessor:
         """
         D_rff = self.config.FEATURE_DIM_RFF
 
+        raw_features = np.asarray(raw_features, dtype=np.float32)
+
         # 验证输入
         if raw_features.shape[0] != D_rff:
             raise ValueError(
@@ -116,12 +127,12 @@ class FeatureProcessor:
 
         # Z-score标准化
         if history_stats is not None:
-            mean = history_stats.get('mean', np.zeros(D_rff))
-            std = history_stats.get('std', np.ones(D_rff))
+            mean = np.asarray(history_stats.get('mean', np.zeros(D_rff)), dtype=np.float32)
+            std = np.asarray(history_stats.get('std', np.ones(D_rff)), dtype=np.float32)
         else:
             # 如果没有历史统计，使用当前数据的统计（仅用于测试）
             mean = raw_features
-            std = np.ones(D_rff)
+            std = np.ones(D_rff, dtype=np.float32)
 
         epsilon = 1e-8  # 防止除零
         Z = (raw_features - mean) / (std + epsilon)
@@ -165,17 +176,78 @@ class FeatureProcessor:
         else:
             raise ValueError(f"Unknown mode: {mode}, expected 'CSI' or 'RFF'")
 
+    @staticmethod
+    def _subcarrier_snr(H: np.ndarray, noise_variance: float) -> np.ndarray:
+        """
+        计算各子载波SNR
+
+        直接用实部、虚部平方和求|H|^2，避免np.abs先开方再平方。
+
+        Args:
+            H: 信道估计，复数数组
+            noise_variance: 噪声功率
+
+        Returns:
+            snr: 各子载波SNR
+        """
+        power = H.real * H.real + H.imag * H.imag
+        return power / (noise_variance + 1e-10)
+
+    @staticmethod
+    def _top_k_indices(values: np.ndarray, k: int) -> np.ndarray:
+        """
+        取最大的k个元素的下标（不保证顺序）
+
+        使用np.argpartition做部分选择，O(N)，无需完整排序。
+
+        Args:
+            values: 一维数组
+            k: 选择数量
+
+        Returns:
+            indices: 下标数组
+        """
+        n = values.shape[0]
+        if k >= n:
+            return np.arange(n)
+        if k <= 0:
+            return np.arange(0)
+        return np.argpartition(values, n - k)[n - k:]
+
     @staticmethod
     def serialize_mask(mask: Dict[str, Any]) -> bytes:
         """
         序列化特征掩码
 
+        process_csi / process_rff 生成的掩码按定长二进制布局打包，
+        以格式版本字节开头，字段顺序固定，结果确定；其他结构回退到JSON。
+
         Args:
             mask: 特征掩码字典
 
         Returns:
             bytes: 序列化后的字节串
         """
+        mode = mask.get('mode')
+
+        if mode == 'CSI' and mask.keys() == _CSI_MASK_KEYS:
+            indices = np.asarray(mask['indices'], dtype=np.int64)
+            if (0 <= mask['N_selected'] <= 0xFFFF and
+                    (indices.size == 0 or (indices.min() >= 0 and indices.max() <= 0xFFFF))):
+                header = _CSI_MASK_HEADER.pack(
+                    _MASK_FORMAT_VERSION, _MASK_TAG_CSI,
+                    mask['N_selected'], mask['noise_variance']
+                )
+                return header + indices.astype('<u2').tobytes()
+
+        elif mode == 'RFF' and mask.keys() == _RFF_MASK_KEYS:
+            mean = np.asarray(mask['mean'], dtype='<f8')
+            std = np.asarray(mask['std'], dtype='<f8')
+            if (mean.ndim == 1 and mean.shape == std.shape and
+                    list(mask['feature_ids']) == list(range(mean.shape[0]))):
+                return (_MASK_FORMAT_VERSION + _MASK_TAG_RFF +
+                        mean.tobytes() + std.tobytes())
+
         json_str = json.dumps(mask, sort_keys=True)
         return json_str.encode('utf-8')
 
@@ -189,9 +261,39 @@ class FeatureProcessor:
 
         Returns:
             Dict: 特征掩码字典
+
+        Raises:
+            ValueError: 二进制掩码的类型标记无法识别
         """
-        json_str = mask_bytes.decode('utf-8')
-        return json.loads(json_str)
+        if mask_bytes[:1] != _MASK_FORMAT_VERSION:
+            json_str = mask_bytes.decode('utf-8')
+            return json.loads(json_str)
+
+        tag = mask_bytes[1:_MASK_PREFIX_LEN]
+
+        if tag == _MASK_TAG_CSI:
+            _, _, n_selected, noise_variance = _CSI_MASK_HEADER.unpack_from(mask_bytes)
+            indices = np.frombuffer(
+                mask_bytes, dtype='<u2', offset=_CSI_MASK_HEADER.size
+            )
+            return {
+                'mode': 'CSI',
+                'indices': indices.tolist(),
+                'N_selected': n_selected,
+                'noise_variance': noise_variance
+            }
+
+        if tag == _MASK_TAG_RFF:
+            values = np.frombuffer(mask_bytes, dtype='<f8', offset=_MASK_PREFIX_LEN)
+            D_rff = values.shape[0] // 2
+            return {
+                'mode': 'RFF',
+                'feature_ids': list(range(D_rff)),
+                'mean': values[:D_rff].tolist(),
+                'std': values[D_rff:].tolist()
+            }
+
+        raise ValueError(f"Unknown binary mask tag: {tag!r}")
 
     def select_high_snr_subcarriers(
         self,
@@ -215,10 +317,10 @@ class FeatureProcessor:
             n_select = self.config.N_SUBCARRIER_SELECTED
 
         # 计算SNR
-        snr = np.abs(H) ** 2 / (noise_variance + 1e-10)
+        snr = self._subcarrier_snr(H, noise_variance)
 
         # 选择SNR最高的n_select个
-        indices = np.argsort(snr)[::-1][:n_select]
+        indices = self._top_k_indices(snr, n_select)
 
         # 保持频域顺序
         indices_sorted = np.sort(indices)
@@ -240,16 +342,43 @@ class FeatureProcessor:
             amp_diff: 幅度差分特征
             phase_diff: 相位差分特征
         """
+        n_diff = H_selected.shape[0] - 1
+        Z = np.empty(2 * n_diff, dtype=np.float32)
+        self._fill_diff_features(H_selected, Z[:n_diff], Z[n_diff:])
+
+        return Z[:n_diff], Z[n_diff:]
+
+    @staticmethod
+    def _fill_diff_features(
+        H_selected: np.ndarray,
+        amp_out: np.ndarray,
+        phase_out: np.ndarray
+    ) -> np.ndarray:
+        """
+        将幅度差分和相位差分写入调用方提供的输出数组
+
+        相位展开在输出数组上原地完成，不产生中间临时数组。
+
+        Args:
+            H_selected: 选中的子载波信道估计，shape (N,)
+            amp_out: 幅度差分输出，shape (N-1,)
+            phase_out: 相位差分输出，shape (N-1,)
+
+        Returns:
+            amp: 子载波幅度，shape (N,)
+        """
         # 幅度差分
         amp = np.abs(H_selected)
-        amp_diff = amp[1:] - amp[:-1]
+        np.subtract(amp[1:], amp[:-1], out=amp_out)
 
         # 相位差分（展开到[-π, π]）
         phase = np.angle(H_selected)
-        phase_diff = phase[1:] - phase[:-1]
-        phase_diff = np.mod(phase_diff + np.pi, 2 * np.pi) - np.pi
+        np.subtract(phase[1:], phase[:-1], out=phase_out)
+        phase_out += np.pi
+        np.mod(phase_out, 2 * np.pi, out=phase_out)
+        phase_out -= np.pi
 
-        return amp_diff, phase_diff
+        return amp
 
 
 # 导出
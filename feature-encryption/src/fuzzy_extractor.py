@@ -8,10 +8,36 @@ import numpy as np
 from typing import List, Tuple
 import importlib
 import sys
+import threading
+from functools import lru_cache
 
 from .config import FeatureEncryptionConfig
 
 
+# bchlib的decode会把伴随式/错误位置暂存在编解码器对象上供correct使用，
+# 共享实例时decode与correct必须成对地在同一临界区内执行
+_BCH_DECODE_LOCK = threading.Lock()
+
+
+@lru_cache(maxsize=8)
+def _make_bch(poly: int, t: int):
+    """
+    获取共享的BCH编解码器（按参数缓存）
+
+    构造bchlib.BCH需要计算伽罗瓦域表，开销远大于单次编解码，
+    因此相同参数的FuzzyExtractor共享同一实例。
+
+    Args:
+        poly: 生成多项式
+        t: 纠错能力
+
+    Returns:
+        bchlib.BCH: 编解码器实例
+    """
+    import bchlib
+    return bchlib.BCH(t, prim_poly=poly)
+
+
 class FuzzyExtractor:
     """模糊提取器（基于BCH码）"""
 
@@ -30,12 +56,8 @@ class FuzzyExtractor:
             # 尝试使用importlib动态导入，处理可能的编码问题
             if 'bchlib' not in sys.modules:
                 importlib.import_module('bchlib')
-            import bchlib
-            # 初始化BCH编解码器
-            self.bch = bchlib.BCH(
-                self.config.BCH_T,  # 纠错能力
-                prim_poly=self.config.BCH_POLY  # 生成多项式
-            )
+            # 初始化BCH编解码器（相同参数的实例间共享）
+            self.bch = _make_bch(self.config.BCH_POLY, self.config.BCH_T)
         except (ImportError, UnicodeDecodeError, Exception) as e:
             print(f"Warning: bchlib import failed ({e}), falling back to reedsolo mock.")
             self.use_mock = True
@@ -56,7 +78,8 @@ class FuzzyExtractor:
 
         # 实际码字长度（字节级）
         self.msg_bytes = (self.k + 7) // 8  # 17字节
-        self.actual_codeword_bytes = self.msg_bytes + self.bch.ecc_bytes  # 35字节
+        self.ecc_bytes = self.bch.ecc_bytes  # 18字节
+        self.actual_codeword_bytes = self.msg_bytes + self.ecc_bytes  # 35字节
         self.actual_codeword_bits = self.actual_codeword_bytes * 8  # 280比特
 
     def _create_mock_bch(self, t):
@@ -119,44 +142,35 @@ class FuzzyExtractor:
         # 计算每块的大小
         block_size = target_bits // blocks
 
-        P_blocks = []
+        # 一次性整理成(blocks, k)的消息比特矩阵（补齐/截断到k位）并逐行打包
+        r_mat = np.asarray(r, dtype=np.uint8)[:blocks * block_size].reshape(blocks, block_size)
+        copy_len = min(block_size, self.k)
+        msg_bits = np.zeros((blocks, self.k), dtype=np.uint8)
+        msg_bits[:, :copy_len] = r_mat[:, :copy_len]
+        msg_mat = np.packbits(msg_bits, axis=1, bitorder='little')
 
-        for j in range(blocks):
-            # 提取该块的比特
-            start = j * block_size
-            end = min((j + 1) * block_size, target_bits)
-            r_block = r[start:end]
+        # r_padded为消息比特后补零到码字长度，打包后即消息字节后接零字节
+        r_padded = np.zeros((blocks, self.actual_codeword_bytes), dtype=np.uint8)
+        r_padded[:, :msg_mat.shape[1]] = msg_mat
 
-            # 补齐到k位（如果需要）
-            if len(r_block) < self.k:
-                r_block = r_block + [0] * (self.k - len(r_block))
-            else:
-                r_block = r_block[:self.k]
+        # 预分配辅助数据，每块直接异或写入对应的行
+        P_mat = np.empty((blocks, self.actual_codeword_bytes), dtype=np.uint8)
 
-            # 转换为字节
-            msg_bytes = self._bits_to_bytes(r_block)
+        bch = self.bch
+        for j in range(blocks):
+            msg_bytes = msg_mat[j].tobytes()
 
             # BCH编码
-            ecc_bytes = self.bch.encode(msg_bytes)
+            ecc_bytes = bch.encode(msg_bytes)
 
             # 码字 = 消息 + ECC
-            codeword_bytes = msg_bytes + ecc_bytes
-
-            # 转换为比特（使用实际码字长度，不截断）
-            codeword_bits = self._bytes_to_bits(codeword_bytes)  # 280比特
+            codeword = np.frombuffer(msg_bytes + ecc_bytes, dtype=np.uint8)
 
             # 计算辅助串：helper = codeword XOR r_padded
-            # r_padded需要扩展到与codeword相同的长度
-            r_padded = r_block + [0] * (self.actual_codeword_bits - len(r_block))
-            helper_bits = [c ^ r_b for c, r_b in zip(codeword_bits, r_padded)]
-
-            # 转换为字节
-            helper_bytes = self._bits_to_bytes(helper_bits)
+            np.bitwise_xor(codeword, r_padded[j], out=P_mat[j])
 
-            P_blocks.append(helper_bytes)
-
-        # 拼接所有块
-        P = b''.join(P_blocks)
+        # 按块顺序拼接
+        P = P_mat.tobytes()
 
         return P
 
@@ -192,35 +206,35 @@ class FuzzyExtractor:
         # 计算每块的辅助数据大小（使用实际码字长度）
         helper_byte_size = self.actual_codeword_bytes  # 35字节
 
-        for j in range(blocks):
-            # 提取该块的r'
-            start = j * block_size
-            end = min((j + 1) * block_size, target_bits)
-            r_prime_block = r_prime[start:end]
+        # 一次性整理成(blocks, block_size)矩阵并逐行打包，
+        # 补齐到实际码字长度（字节级，超出码字长度的比特不参与异或）
+        r_prime_mat = np.asarray(r_prime, dtype=np.uint8)[:blocks * block_size].reshape(blocks, block_size)
+        r_prime_packed = np.packbits(
+            r_prime_mat[:, :self.actual_codeword_bits], axis=1, bitorder='little'
+        )
+        r_prime_padded = np.zeros((blocks, helper_byte_size), dtype=np.uint8)
+        r_prime_padded[:, :r_prime_packed.shape[1]] = r_prime_packed
 
-            # 补齐到实际码字长度
-            r_prime_padded = r_prime_block + [0] * (self.actual_codeword_bits - len(r_prime_block))
+        # 循环内使用的属性提前取为局部变量
+        bch = self.bch
+        k = self.k
+        # 分离消息和ECC - 使用bch.ecc_bytes确定ECC长度
+        msg_byte_size = self.msg_bytes
+        ecc_byte_size = self.ecc_bytes
+        total_needed = msg_byte_size + ecc_byte_size
 
+        for j in range(blocks):
             # 提取该块的辅助数据
             helper_start = j * helper_byte_size
             helper_end = (j + 1) * helper_byte_size
-            helper_bytes = P[helper_start:helper_end]
-
-            # 转换为比特（使用实际码字长度）
-            helper_bits = self._bytes_to_bits(helper_bytes, self.actual_codeword_bits)
+            helper = np.frombuffer(P[helper_start:helper_end], dtype=np.uint8)
 
             # 恢复码字：codeword = helper XOR r_padded
-            noisy_codeword_bits = [h ^ r for h, r in zip(helper_bits, r_prime_padded)]
-
-            # 转换为字节
-            noisy_codeword_bytes = self._bits_to_bytes(noisy_codeword_bits)
-
-            # 分离消息和ECC - 使用bch.ecc_bytes确定ECC长度
-            msg_byte_size = self.msg_bytes  # 使用预计算的值
-            ecc_byte_size = self.bch.ecc_bytes  # ECC字节数（从BCH库获取）
+            noisy_codeword_bytes = np.bitwise_xor(
+                helper, r_prime_padded[j, :helper.size]
+            ).tobytes()
 
             # 确保我们有足够的字节
-            total_needed = msg_byte_size + ecc_byte_size
             if len(noisy_codeword_bytes) < total_needed:
                 # 补齐（不应该发生，但防御性编程）
                 noisy_codeword_bytes += b'\x00' * (total_needed - len(noisy_codeword_bytes))
@@ -229,9 +243,9 @@ class FuzzyExtractor:
             ecc_bytes = noisy_codeword_bytes[msg_byte_size:msg_byte_size + ecc_byte_size]
 
             # 验证ECC长度
-            if len(ecc_bytes) != self.bch.ecc_bytes:
+            if len(ecc_bytes) != ecc_byte_size:
                 raise ValueError(
-                    f"ECC length mismatch: expected {self.bch.ecc_bytes} bytes, "
+                    f"ECC length mismatch: expected {ecc_byte_size} bytes, "
                     f"got {len(ecc_bytes)} bytes"
                 )
 
@@ -241,81 +255,60 @@ class FuzzyExtractor:
 
             # BCH解码
             try:
-                bit_flips = self.bch.decode(noisy_msg_ba, ecc_bytes_ba)
+                with _BCH_DECODE_LOCK:
+                    bit_flips = bch.decode(noisy_msg_ba, ecc_bytes_ba)
+                    if bit_flips > 0:
+                        # 解码成功且存在错误，应用纠错（无错误时无需纠错）
+                        bch.correct(noisy_msg_ba, ecc_bytes_ba)
                 if bit_flips < 0:
                     # 解码失败（错误太多，超出纠错能力）
                     success = False
-                    # 仍然返回未纠错的消息
-                    corrected_msg = bytes(noisy_msg_ba)
-                else:
-                    # 解码成功，应用纠错
-                    self.bch.correct(noisy_msg_ba, ecc_bytes_ba)
-                    corrected_msg = bytes(noisy_msg_ba)
+                # 解码失败时仍然返回未纠错的消息
+                corrected_msg = bytes(noisy_msg_ba)
             except Exception as e:
                 # BCH解码异常
                 success = False
                 corrected_msg = bytes(noisy_msg)
 
             # 转换为比特
-            corrected_bits = self._bytes_to_bits(corrected_msg, self.k)
+            corrected_bits = self._bytes_to_bits(corrected_msg, k)
 
             # 取前block_size位
             S_blocks.append(corrected_bits[:block_size])
 
-        # 拼接所有块
-        S = []
-        for block in S_blocks:
-            S.extend(block)
-
-        # 截断到target_bits
-        S = S[:target_bits]
+        # 拼接所有块并截断到target_bits
+        S = np.concatenate(S_blocks)[:target_bits].tolist()
 
         return S, success
 
     @staticmethod
-    def _bits_to_bytes(bits: List[int]) -> bytes:
+    def _bits_to_bytes(bits) -> bytes:
         """
-        将比特列表转换为字节串
+        将比特序列转换为字节串（LSB优先，不足8位的末字节补零）
 
         Args:
-            bits: 比特列表
+            bits: 比特列表或uint8数组
 
         Returns:
             bytes: 字节串
         """
-        # 补齐到8的倍数
-        padded_bits = bits + [0] * ((-len(bits)) % 8)
-
-        bytes_array = bytearray()
-        for i in range(0, len(padded_bits), 8):
-            byte = 0
-            for j in range(8):
-                byte |= padded_bits[i + j] << j
-            bytes_array.append(byte)
-
-        return bytes(bytes_array)
+        return np.packbits(np.asarray(bits, dtype=np.uint8), bitorder='little').tobytes()
 
     @staticmethod
-    def _bytes_to_bits(data: bytes, length: int = None) -> List[int]:
+    def _bytes_to_bits(data: bytes, length: int = None) -> np.ndarray:
         """
-        将字节串转换为比特列表
+        将字节串转换为比特数组（LSB优先）
 
         Args:
             data: 字节串
             length: 输出长度，默认为8*len(data)
 
         Returns:
-            List[int]: 比特列表
+            np.ndarray: uint8比特数组
         """
-        bits = []
-        for byte in data:
-            for i in range(8):
-                bits.append((byte >> i) & 1)
-
-        if length is not None:
-            bits = bits[:length]
-
-        return bits
+        return np.unpackbits(
+            np.frombuffer(data, dtype=np.uint8), bitorder='little'
+        )[:length]
 
     def test_error_correction(
         self,
@@ -338,20 +331,21 @@ class FuzzyExtractor:
         P = self.generate_helper_data(r)
 
         # 人为引入错误
-        r_prime = r.copy()
+        r_arr = np.asarray(r, dtype=np.uint8)
         error_positions = np.random.choice(
             len(r),
             size=min(num_errors, len(r)),
             replace=False
         )
-        for pos in error_positions:
-            r_prime[pos] = 1 - r_prime[pos]  # 翻转比特
+        r_prime_arr = r_arr.copy()
+        r_prime_arr[error_positions] ^= 1  # 翻转比特
+        r_prime = r_prime_arr.tolist()
 
         # 提取稳定密钥
         S, success = self.extract_stable_key(r_prime, P)
 
         # 计算实际纠正的错误数
-        actual_errors = sum([1 for i in range(len(r)) if r[i] != r_prime[i]])
+        actual_errors = int(np.count_nonzero(r_prime_arr != r_arr))
 
         return S, success, actual_errors
 
@@ -0,0 +1,147 @@
+"""
+辅助数据存储模块
+
+为FeatureEncryption提供可替换的辅助数据与量化门限存储后端。
+"""
+
+from abc import ABC, abstractmethod
+
+import numpy as np
+from typing import Dict, Optional, Tuple
+
+try:
+    import lmdb
+    HAS_LMDB = True
+except ImportError:
+    HAS_LMDB = False
+
+
+class HelperStore(ABC):
+    """辅助数据存储接口"""
+
+    @abstractmethod
+    def put_helper_data(self, device_id: str, P: bytes) -> None:
+        """存储辅助数据"""
+
+    @abstractmethod
+    def get_helper_data(self, device_id: str) -> Optional[bytes]:
+        """读取辅助数据，不存在时返回None"""
+
+    @abstractmethod
+    def put_thresholds(
+        self,
+        device_id: str,
+        theta_L: np.ndarray,
+        theta_H: np.ndarray
+    ) -> None:
+        """存储量化门限"""
+
+    @abstractmethod
+    def get_thresholds(
+        self,
+        device_id: str
+    ) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """读取量化门限，不存在时返回None"""
+
+
+class InMemoryHelperStore(HelperStore):
+    """进程内字典存储（默认后端，不持久化）"""
+
+    def __init__(self):
+        self._helper_data: Dict[str, bytes] = {}
+        self._thresholds: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def put_helper_data(self, device_id: str, P: bytes) -> None:
+        self._helper_data[device_id] = P
+
+    def get_helper_data(self, device_id: str) -> Optional[bytes]:
+        return self._helper_data.get(device_id)
+
+    def put_thresholds(
+        self,
+        device_id: str,
+        theta_L: np.ndarray,
+        theta_H: np.ndarray
+    ) -> None:
+        self._thresholds[device_id] = (theta_L, theta_H)
+
+    def get_thresholds(
+        self,
+        device_id: str
+    ) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        return self._thresholds.get(device_id)
+
+
+class LmdbHelperStore(HelperStore):
+    """基于LMDB的持久化存储（需要安装lmdb）
+
+    门限以原始数组字节保存（不经pickle），值格式为：
+    dtype描述长度(1字节) + dtype描述(如'<f4') + theta_L字节 + theta_H字节
+    """
+
+    _HELPER_SUFFIX = b'\x00P'
+    _THRESHOLD_SUFFIX = b'\x00T'
+
+    def __init__(self, path: str, map_size: int = 1 << 30):
+        """
+        打开（或创建）LMDB存储
+
+        Args:
+            path: 数据库目录
+            map_size: 最大映射大小（字节）
+
+        Raises:
+            ImportError: 未安装lmdb
+        """
+        if not HAS_LMDB:
+            raise ImportError("LmdbHelperStore requires lmdb (pip install lmdb)")
+        self.env = lmdb.open(path, map_size=map_size)
+
+    def close(self) -> None:
+        """关闭数据库"""
+        self.env.close()
+
+    def put_helper_data(self, device_id: str, P: bytes) -> None:
+        with self.env.begin(write=True) as txn:
+            txn.put(device_id.encode('utf-8') + self._HELPER_SUFFIX, P)
+
+    def get_helper_data(self, device_id: str) -> Optional[bytes]:
+        with self.env.begin() as txn:
+            return txn.get(device_id.encode('utf-8') + self._HELPER_SUFFIX)
+
+    def put_thresholds(
+        self,
+        device_id: str,
+        theta_L: np.ndarray,
+        theta_H: np.ndarray
+    ) -> None:
+        if theta_L.shape != theta_H.shape or theta_L.dtype != theta_H.dtype:
+            raise ValueError("theta_L and theta_H must have the same shape and dtype")
+
+        dtype_str = theta_L.dtype.str.encode('ascii')
+        value = (
+            bytes([len(dtype_str)]) + dtype_str +
+            np.ascontiguousarray(theta_L).tobytes() +
+            np.ascontiguousarray(theta_H).tobytes()
+        )
+        with self.env.begin(write=True) as txn:
+            txn.put(device_id.encode('utf-8') + self._THRESHOLD_SUFFIX, value)
+
+    def get_thresholds(
+        self,
+        device_id: str
+    ) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        with self.env.begin() as txn:
+            value = txn.get(device_id.encode('utf-8') + self._THRESHOLD_SUFFIX)
+        if value is None:
+            return None
+
+        dtype_len = value[0]
+        dtype = np.dtype(value[1:1 + dtype_len].decode('ascii'))
+        thresholds = np.frombuffer(value, dtype=dtype, offset=1 + dtype_len)
+        D = thresholds.shape[0] // 2
+        return thresholds[:D], thresholds[D:]
+
+
+# 导出
+__all__ = ['HelperStore', 'InMemoryHelperStore', 'LmdbHelperStore', 'HAS_LMDB']
@@ -5,13 +5,14 @@
 """
 
 import struct
+import hashlib
+import numpy as np
 from typing import Dict, Any
 try:
     import blake3
     HAS_BLAKE3 = True
 except ImportError:
     HAS_BLAKE3 = False
-    import hashlib
 
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.hkdf import HKDF, HKDFExpand
@@ -59,11 +60,8 @@ class KeyDerivation:
         # 编码epoch为4字节
         epoch_bytes = struct.pack('<I', epoch)  # 小端序，无符号整数
 
-        # 拼接数据
-        data = epoch_bytes + nonce
-
-        # BLAKE3哈希
-        hash_output = self._hash(data)
+        # BLAKE3哈希（逐段送入，不拼接epoch||nonce）
+        hash_output = self._hash(epoch_bytes, nonce)
 
         # 截断到32字节
         L = hash_output[:32]
@@ -128,10 +126,9 @@ class KeyDerivation:
         )
         PRK = hkdf_extract.derive(IKM)
 
-        # 准备info
-        ver_bytes = struct.pack('B', ver)  # 1 byte
-        epoch_bytes = struct.pack('<I', epoch)  # 4 bytes
-        info = ver_bytes + srcMAC + dstMAC + epoch_bytes  # 1+6+6+4 = 17 bytes
+        # 准备info：ver(1) || srcMAC(6) || dstMAC(6) || epoch(4，小端) = 17 bytes
+        mac_len = self.config.MAC_LENGTH
+        info = struct.pack(f'<B{mac_len}s{mac_len}sI', ver, srcMAC, dstMAC, epoch)
 
         # HKDF-Expand
         hkdf_expand = HKDF(
@@ -174,10 +171,11 @@ class KeyDerivation:
             )
 
         # 准备info
+        # info：label || epoch(4，小端) || Ci(4，小端)
         session_key_label = self.config.SESSION_KEY_INFO.encode('utf-8')
-        epoch_bytes = struct.pack('<I', epoch)  # 4 bytes
-        ci_bytes = struct.pack('<I', Ci)  # 4 bytes
-        info = session_key_label + epoch_bytes + ci_bytes
+        info = struct.pack(
+            f'<{len(session_key_label)}sII', session_key_label, epoch, Ci
+        )
 
         # HKDF-Expand：只执行Expand阶段，K已经是PRK
         hkdf_expand = HKDFExpand(
@@ -215,35 +213,38 @@ class KeyDerivation:
         if ver is None:
             ver = self.config.VERSION
 
-        # 拼接数据
-        algID_bytes = struct.pack('B', algID)
-        ver_bytes = struct.pack('B', ver)
-
-        data = mask_bytes + theta_L + theta_H + algID_bytes + ver_bytes
+        # 逐段送入哈希器，不拼接门限数组（与拼接后哈希结果一致）
+        tail = struct.pack('BB', algID, ver)
 
         # BLAKE3哈希
-        hash_output = self._hash(data)
+        hash_output = self._hash(mask_bytes, theta_L, theta_H, tail)
 
         # 截断
         digest = hash_output[:self.config.DIGEST_LENGTH]
 
         return digest
 
-    def _hash(self, data: bytes) -> bytes:
+    def _hash(self, *parts: bytes) -> bytes:
         """
         内部哈希函数
 
+        多段输入依次update，结果等同于对拼接后的数据做一次哈希。
+
         Args:
-            data: 待哈希数据
+            parts: 待哈希数据（一段或多段）
 
         Returns:
             hash_output: 哈希值（32字节）
         """
         if self.config.HASH_ALGORITHM == 'blake3' and HAS_BLAKE3:
-            return blake3.blake3(data).digest()
+            hasher = blake3.blake3()
         else:
             # 回退到SHA256
-            return hashlib.sha256(data).digest()
+            hasher = hashlib.sha256()
+
+        for part in parts:
+            hasher.update(part)
+        return hasher.digest()
 
     def bits_to_bytes(self, bits: list) -> bytes:
         """
@@ -255,17 +256,8 @@ class KeyDerivation:
         Returns:
             bytes: 字节串
         """
-        # 补齐到8的倍数
-        padded_bits = bits + [0] * ((-len(bits)) % 8)
-
-        bytes_array = bytearray()
-        for i in range(0, len(padded_bits), 8):
-            byte = 0
-            for j in range(8):
-                byte |= padded_bits[i + j] << j
-            bytes_array.append(byte)
-
-        return bytes(bytes_array)
+        # 每字节低位在前；packbits会自动将末尾不足8位的部分补0
+        return np.packbits(np.asarray(bits, dtype=np.uint8), bitorder='little').tobytes()
 
 
 # 导出
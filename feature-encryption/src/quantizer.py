@@ -47,22 +47,23 @@ class FeatureQuantizer:
         M, D = Z_frames.shape
 
         if method == 'percentile':
-            # 基于分位数的门限
-            theta_L = np.percentile(
+            # 基于分位数的门限（一次调用同时求上下分位数，每列只排序一次）
+            thresholds = np.percentile(
                 Z_frames,
-                self.config.THETA_L_PERCENTILE * 100,
-                axis=0
-            )  # shape: (D,)
-            theta_H = np.percentile(
-                Z_frames,
-                self.config.THETA_H_PERCENTILE * 100,
+                [self.config.THETA_L_PERCENTILE * 100,
+                 self.config.THETA_H_PERCENTILE * 100],
                 axis=0
             )
+            if np.issubdtype(Z_frames.dtype, np.floating):
+                # 保持输入精度，float32特征不被提升为float64
+                thresholds = thresholds.astype(Z_frames.dtype, copy=False)
+            theta_L, theta_H = thresholds  # shape: (D,), (D,)
 
         elif method == 'fixed':
-            # 基于均值±标准差的固定倍数
-            mean = np.mean(Z_frames, axis=0)  # shape: (D,)
-            std = np.std(Z_frames, axis=0)
+            # 基于均值±标准差的固定倍数（复用均值，避免np.std再求一遍）
+            mean = Z_frames.mean(axis=0)  # shape: (D,)
+            centered = Z_frames - mean
+            std = np.sqrt(np.einsum('ij,ij->j', centered, centered) / M)
 
             theta_L = mean - 0.5 * std
             theta_H = mean + 0.5 * std
@@ -82,25 +83,34 @@ class FeatureQuantizer:
         将单帧特征量化为三值{0, 1, -1}
 
         Args:
-            Z: 特征向量，shape (D,)
+            Z: 特征向量，shape (D,)；也可传入多帧 (M, D)，门限按列广播
             theta_L: 下门限，shape (D,)
             theta_H: 上门限，shape (D,)
 
         Returns:
-            Q: 量化结果，shape (D,)，值为{0, 1, -1}，其中-1表示擦除
+            Q: 量化结果，shape与Z相同，值为{0, 1, -1}，其中-1表示擦除
         """
-        Q = np.zeros_like(Z, dtype=np.int8)
+        above, between = self._quantize_masks(Z, theta_L, theta_H)
 
-        # 高于上门限 → 1
-        Q[Z > theta_H] = 1
+        # 低于下门限及无法比较（NaN）→ 0；两个布尔掩码互斥，相减即得三值结果
+        return above.view(np.int8) - between.view(np.int8)
 
-        # 低于下门限 → 0
-        Q[Z < theta_L] = 0
-
-        # 介于两者之间 → -1（擦除）
-        Q[(Z >= theta_L) & (Z <= theta_H)] = -1
+    @staticmethod
+    def _quantize_masks(
+        Z: np.ndarray,
+        theta_L: np.ndarray,
+        theta_H: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        计算量化为1和-1（擦除）的布尔掩码，其余位置量化为0
 
-        return Q
+        Returns:
+            above: 高于上门限（低于下门限优先判为0）
+            between: 介于两门限之间
+        """
+        above = (Z > theta_H) & ~(Z < theta_L)
+        between = (Z >= theta_L) & (Z <= theta_H)
+        return above, between
 
     def quantize_frames(
         self,
@@ -119,13 +129,33 @@ class FeatureQuantizer:
         Returns:
             Q_frames: 量化结果，shape (M, D)
         """
-        M, D = Z_frames.shape
-        Q_frames = np.zeros((M, D), dtype=np.int8)
+        # 门限按列广播，整个(M, D)矩阵一次量化
+        return self.quantize_frame(Z_frames, theta_L, theta_H)
+
+    def compute_vote_counts(
+        self,
+        Z_frames: np.ndarray,
+        theta_L: np.ndarray,
+        theta_H: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        直接由门限比较统计每个维度的0/1票数，不生成三值量化矩阵
 
-        for m in range(M):
-            Q_frames[m] = self.quantize_frame(Z_frames[m], theta_L, theta_H)
+        结果与先quantize_frames再统计Q==0、Q==1一致。
 
-        return Q_frames
+        Args:
+            Z_frames: 多帧特征，shape (M, D)
+            theta_L: 下门限，shape (D,)
+            theta_H: 上门限，shape (D,)
+
+        Returns:
+            count_0: 每个维度量化为0的帧数，shape (D,)
+            count_1: 每个维度量化为1的帧数，shape (D,)
+        """
+        above, between = self._quantize_masks(Z_frames, theta_L, theta_H)
+        count_1 = np.count_nonzero(above, axis=0)
+        count_0 = Z_frames.shape[0] - count_1 - np.count_nonzero(between, axis=0)
+        return count_0, count_1
 
     def majority_vote(
         self,
@@ -143,28 +173,39 @@ class FeatureQuantizer:
             r_bits: 投票得到的比特列表
             selected_dims: 选中的维度列表
         """
-        if vote_threshold is None:
-            vote_threshold = self.config.VOTE_THRESHOLD
+        # 逐列统计0和1的票数（忽略-1）
+        count_0 = np.count_nonzero(Q_frames == 0, axis=0)
+        count_1 = np.count_nonzero(Q_frames == 1, axis=0)
 
-        M, D = Q_frames.shape
-        r_bits = []
-        selected_dims = []
+        return self.majority_vote_from_counts(count_0, count_1, vote_threshold)
 
-        for d in range(D):
-            votes_d = Q_frames[:, d]  # shape: (M,)
+    def majority_vote_from_counts(
+        self,
+        count_0: np.ndarray,
+        count_1: np.ndarray,
+        vote_threshold: int = None
+    ) -> Tuple[List[int], List[int]]:
+        """
+        根据每个维度的0/1票数做多数投票
+
+        Args:
+            count_0: 每个维度的0票数，shape (D,)
+            count_1: 每个维度的1票数，shape (D,)
+            vote_threshold: 投票通过阈值，默认使用配置
+
+        Returns:
+            r_bits: 投票得到的比特列表
+            selected_dims: 选中的维度列表
+        """
+        if vote_threshold is None:
+            vote_threshold = self.config.VOTE_THRESHOLD
 
-            # 统计0和1的票数（忽略-1）
-            count_0 = np.sum(votes_d == 0)
-            count_1 = np.sum(votes_d == 1)
+        # 投票决策：1优先；票数都不足的维度丢弃
+        vote_1 = count_1 >= vote_threshold
+        selected = vote_1 | (count_0 >= vote_threshold)
 
-            # 投票决策
-            if count_1 >= vote_threshold:
-                r_bits.append(1)
-                selected_dims.append(d)
-            elif count_0 >= vote_threshold:
-                r_bits.append(0)
-                selected_dims.append(d)
-            # else: 票数不足，丢弃该维度
+        selected_dims = np.flatnonzero(selected).tolist()
+        r_bits = vote_1[selected].astype(np.uint8).tolist()
 
         return r_bits, selected_dims
 
@@ -173,8 +214,9 @@ class FeatureQuantizer:
         r_bits: List[int],
         selected_dims: List[int],
         Z_frames: np.ndarray,
-        Q_frames: np.ndarray,
-        target_bits: int = None
+        Q_frames: Optional[np.ndarray],
+        target_bits: int = None,
+        vote_counts: Optional[Tuple[np.ndarray, np.ndarray]] = None
     ) -> List[int]:
         """
         将比特串补齐到目标长度
@@ -183,8 +225,9 @@ class FeatureQuantizer:
             r_bits: 当前比特列表
             selected_dims: 已选中的维度
             Z_frames: 原始特征帧，shape (M, D)
-            Q_frames: 量化特征帧，shape (M, D)
+            Q_frames: 量化特征帧，shape (M, D)；提供vote_counts时可为None
             target_bits: 目标比特数，默认使用配置
+            vote_counts: compute_vote_counts得到的(count_0, count_1)，提供时不再统计Q_frames
 
         Returns:
             r: 补齐后的比特列表
@@ -204,33 +247,30 @@ class FeatureQuantizer:
         needed = target_bits - len(r)
 
         # 策略1：从未使用的维度中，选择SNR最高的
-        unused_dims = [d for d in range(D) if d not in used_dims]
+        unused_mask = np.ones(D, dtype=bool)
+        unused_mask[list(used_dims)] = False
+        unused_dims = np.flatnonzero(unused_mask)
 
-        if unused_dims:
-            # 计算每个维度的"稳定性"（方差的倒数作为SNR的代理）
-            stability = np.zeros(len(unused_dims))
-            for i, d in enumerate(unused_dims):
-                # 使用标准差的倒数作为稳定性指标
-                std = np.std(Z_frames[:, d])
-                stability[i] = 1.0 / (std + 1e-8)
+        if unused_dims.size:
+            # 计算每个维度的"稳定性"（标准差的倒数作为SNR的代理）
+            # 转置为连续行后逐行求标准差，与逐列np.std的数值完全一致
+            stds = np.ascontiguousarray(Z_frames[:, unused_dims].T).std(axis=1)
+            stability = 1.0 / (stds + 1e-8)
 
-            # 按稳定性排序
+            # 按稳定性排序，依次取需要的维度
             sorted_indices = np.argsort(stability)[::-1]
-
-            # 依次添加维度
-            for idx in sorted_indices[:needed]:
-                d = unused_dims[idx]
-                # 简单多数投票
-                votes = Q_frames[:, d]
-                count_0 = np.sum(votes == 0)
-                count_1 = np.sum(votes == 1)
-
-                bit = 1 if count_1 >= count_0 else 0
-                r.append(bit)
-                used_dims.add(d)
-
-                if len(r) >= target_bits:
-                    break
+            chosen = unused_dims[sorted_indices[:needed]]
+
+            # 简单多数投票（平票取1）
+            if vote_counts is not None:
+                count_0 = vote_counts[0][chosen]
+                count_1 = vote_counts[1][chosen]
+            else:
+                votes = Q_frames[:, chosen]
+                count_0 = np.count_nonzero(votes == 0, axis=0)
+                count_1 = np.count_nonzero(votes == 1, axis=0)
+            r.extend((count_1 >= count_0).astype(np.uint8).tolist())
+            used_dims.update(chosen.tolist())
 
         # 策略2：如果还不够，使用安全随机数填充
         if len(r) < target_bits:
@@ -251,19 +291,14 @@ class FeatureQuantizer:
         """
         # 测试模式：使用确定性填充
         if self._deterministic_mode:
-            return [i % 2 for i in range(n)]
+            return (np.arange(n) & 1).tolist()
 
         # 生产模式：使用密码学安全的随机数
+        # 每字节低位在前展开
         random_bytes = secrets.token_bytes((n + 7) // 8)
-        bits = []
-        for byte in random_bytes:
-            for i in range(8):
-                if len(bits) >= n:
-                    break
-                bits.append((byte >> i) & 1)
-            if len(bits) >= n:
-                break
-        return bits[:n]
+        return np.unpackbits(
+            np.frombuffer(random_bytes, dtype=np.uint8), bitorder='little'
+        )[:n].tolist()
 
     def process_multi_frames(
         self,
@@ -283,14 +318,14 @@ class FeatureQuantizer:
         # 计算门限
         theta_L, theta_H = self.compute_thresholds(Z_frames)
 
-        # 量化
-        Q_frames = self.quantize_frames(Z_frames, theta_L, theta_H)
-
-        # 投票
-        r_bits, selected_dims = self.majority_vote(Q_frames)
+        # 量化并投票（直接统计票数，不生成三值矩阵）
+        vote_counts = self.compute_vote_counts(Z_frames, theta_L, theta_H)
+        r_bits, selected_dims = self.majority_vote_from_counts(*vote_counts)
 
         # 补齐到目标长度
-        r = self.pad_bits_to_target(r_bits, selected_dims, Z_frames, Q_frames)
+        r = self.pad_bits_to_target(
+            r_bits, selected_dims, Z_frames, None, vote_counts=vote_counts
+        )
 
         return r, theta_L, theta_H
 
@@ -311,14 +346,14 @@ class FeatureQuantizer:
         Returns:
             r: 比特串
         """
-        # 量化
-        Q_frames = self.quantize_frames(Z_frames, theta_L, theta_H)
-
-        # 投票
-        r_bits, selected_dims = self.majority_vote(Q_frames)
+        # 量化并投票（直接统计票数，不生成三值矩阵）
+        vote_counts = self.compute_vote_counts(Z_frames, theta_L, theta_H)
+        r_bits, selected_dims = self.majority_vote_from_counts(*vote_counts)
 
         # 补齐到目标长度
-        r = self.pad_bits_to_target(r_bits, selected_dims, Z_frames, Q_frames)
+        r = self.pad_bits_to_target(
+            r_bits, selected_dims, Z_frames, None, vote_counts=vote_counts
+        )
 
         return r
 
@@ -332,25 +367,15 @@ class FeatureQuantizer:
         Returns:
             stability: 每个维度的稳定性分数，shape (D,)
         """
-        M, D = Q_frames.shape
-        stability = np.zeros(D)
-
-        for d in range(D):
-            votes = Q_frames[:, d]
-
-            # 去除擦除标记
-            valid_votes = votes[votes != -1]
-
-            if len(valid_votes) == 0:
-                stability[d] = 0.0
-                continue
-
-            # 计算一致性：同一值的票数占比
-            count_0 = np.sum(valid_votes == 0)
-            count_1 = np.sum(valid_votes == 1)
-            max_count = max(count_0, count_1)
-
-            stability[d] = max_count / len(valid_votes)
+        # 有效票数（去除擦除标记）及0/1票数，逐列统计
+        valid_count = np.count_nonzero(Q_frames != -1, axis=0)
+        count_0 = np.count_nonzero(Q_frames == 0, axis=0)
+        count_1 = np.count_nonzero(Q_frames == 1, axis=0)
+        max_count = np.maximum(count_0, count_1)
+
+        # 计算一致性：同一值的票数占比；全部擦除的维度记为0
+        stability = np.zeros(Q_frames.shape[1])
+        np.divide(max_count, valid_count, out=stability, where=valid_count > 0)
 
         return stability
 
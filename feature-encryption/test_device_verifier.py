@@ -29,28 +29,32 @@ class SimulatedCSIChannel:
             seed: 随机种子
         """
         self.num_subcarriers = num_subcarriers
-        if seed is not None:
-            np.random.seed(seed)
+        # 使用独立的Generator(PCG64)，不修改全局随机状态
+        self.rng = np.random.default_rng(seed)
 
         # 生成信道基础特性（Rayleigh衰落）
-        self.h_real = np.random.randn(num_subcarriers)
-        self.h_imag = np.random.randn(num_subcarriers)
+        self.h_real = self.rng.standard_normal(num_subcarriers)
+        self.h_imag = self.rng.standard_normal(num_subcarriers)
         self.H_base = self.h_real + 1j * self.h_imag
 
-    def measure(self, noise_level=0.1):
+    def measure(self, noise_level=0.1, rng=None):
         """
         模拟一次CSI测量（添加噪声）
 
         Args:
             noise_level: 噪声标准差
+            rng: 随机数生成器，None表示使用信道自身的生成器
 
         Returns:
             H: 信道频域响应
             noise_var: 噪声方差
         """
+        if rng is None:
+            rng = self.rng
+
         # 添加测量噪声
-        noise_real = np.random.randn(self.num_subcarriers) * noise_level
-        noise_imag = np.random.randn(self.num_subcarriers) * noise_level
+        noise_real = rng.standard_normal(self.num_subcarriers) * noise_level
+        noise_imag = rng.standard_normal(self.num_subcarriers) * noise_level
         noise = noise_real + 1j * noise_imag
 
         H_measured = self.H_base + noise
@@ -58,18 +62,26 @@ class SimulatedCSIChannel:
 
         return H_measured, noise_var
 
-    def measure_multi_frames(self, M=6, noise_level=0.1):
+    def measure_multi_frames(self, M=6, noise_level=0.1, seed=None):
         """
         模拟多帧CSI测量
 
         Args:
             M: 帧数
             noise_level: 噪声标准差
+            seed: 本次测量的随机种子，None表示使用信道自身的生成器
 
         Returns:
             measurements: list of (H, noise_var) tuples
         """
-        return [self.measure(noise_level) for _ in range(M)]
+        rng = self.rng if seed is None else np.random.default_rng(seed)
+
+        # 一次性生成M帧噪声；(M, 2, N)的抽样顺序与逐帧调用measure()一致
+        noise = rng.standard_normal((M, 2, self.num_subcarriers)) * noise_level
+        H_frames = self.H_base + (noise[:, 0] + 1j * noise[:, 1])
+        noise_var = noise_level ** 2
+
+        return [(H, noise_var) for H in H_frames]
 
 
 class DeviceSide:
@@ -211,8 +223,7 @@ def test_scenario_1_low_noise():
     device = DeviceSide(config)
 
     # 设备端测量CSI
-    np.random.seed(100)
-    device_measurements = channel.measure_multi_frames(M=6, noise_level=0.05)
+    device_measurements = channel.measure_multi_frames(M=6, noise_level=0.05, seed=100)
 
     # 注册
     key_reg, metadata, helper_package = device.register(device_id, device_measurements, context)
@@ -226,8 +237,7 @@ def test_scenario_1_low_noise():
     verifier = VerifierSide(config)
 
     # 验证端独立测量CSI（不同噪声实现）
-    np.random.seed(200)
-    verifier_measurements = channel.measure_multi_frames(M=6, noise_level=0.05)
+    verifier_measurements = channel.measure_multi_frames(M=6, noise_level=0.05, seed=200)
 
     # 认证
     key_auth, success = verifier.authenticate(device_id, verifier_measurements, context, helper_package)
@@ -288,16 +298,14 @@ def test_scenario_2_medium_noise():
     # 设备端注册
     print("\n[阶段1] 设备端注册")
     device = DeviceSide(config)
-    np.random.seed(100)
-    device_measurements = channel.measure_multi_frames(M=6, noise_level=0.15)
+    device_measurements = channel.measure_multi_frames(M=6, noise_level=0.15, seed=100)
     key_reg, metadata, helper_package = device.register(device_id, device_measurements, context)
     print(f"  特征密钥 K:  {key_reg.K.hex()[:40]}...")
 
     # 验证端认证
     print("\n[阶段2] 验证端认证")
     verifier = VerifierSide(config)
-    np.random.seed(200)
-    verifier_measurements = channel.measure_multi_frames(M=6, noise_level=0.15)
+    verifier_measurements = channel.measure_multi_frames(M=6, noise_level=0.15, seed=200)
     key_auth, success = verifier.authenticate(device_id, verifier_measurements, context, helper_package)
 
     if success:
@@ -342,15 +350,13 @@ def test_scenario_3_high_noise():
 
     print("\n[阶段1] 设备端注册")
     device = DeviceSide(config)
-    np.random.seed(100)
-    device_measurements = channel.measure_multi_frames(M=config.M_FRAMES, noise_level=0.25)
+    device_measurements = channel.measure_multi_frames(M=config.M_FRAMES, noise_level=0.25, seed=100)
     key_reg, metadata, helper_package = device.register(device_id, device_measurements, context)
     print(f"  特征密钥 K:  {key_reg.K.hex()[:40]}...")
 
     print("\n[阶段2] 验证端认证")
     verifier = VerifierSide(config)
-    np.random.seed(200)
-    verifier_measurements = channel.measure_multi_frames(M=config.M_FRAMES, noise_level=0.25)
+    verifier_measurements = channel.measure_multi_frames(M=config.M_FRAMES, noise_level=0.25, seed=200)
     key_auth, success = verifier.authenticate(device_id, verifier_measurements, context, helper_package)
 
     if success:
@@ -405,15 +411,14 @@ def test_scenario_4_different_context():
     # 使用context1注册
     print("\n[测试] 使用context1注册")
     device = DeviceSide(config)
-    np.random.seed(100)
-    measurements = channel.measure_multi_frames(M=6, noise_level=0.1)
+    measurements = channel.measure_multi_frames(M=6, noise_level=0.1, seed=100)
     key1, _, helper = device.register(device_id, measurements, context1)
 
     # 使用context2认证（应该失败或产生不同密钥）
     print("\n[测试] 使用context2认证")
     verifier = VerifierSide(config)
-    np.random.seed(100)  # 相同的随机种子，相同的特征
-    measurements2 = channel.measure_multi_frames(M=6, noise_level=0.1)
+    # 相同的随机种子，相同的特征
+    measurements2 = channel.measure_multi_frames(M=6, noise_level=0.1, seed=100)
     key2, success = verifier.authenticate(device_id, measurements2, context2, helper)
 
     if success:
@@ -53,10 +53,7 @@ def main():
     base_feature = np.random.randn(D)
 
     # 生成多帧（添加少量噪声）
-    Z_frames = np.zeros((M, D))
-    for m in range(M):
-        noise = np.random.randn(D) * 0.1  # 10%噪声
-        Z_frames[m] = base_feature + noise
+    Z_frames = base_feature + np.random.randn(M, D) * 0.1  # 10%噪声
 
     print(f"   [OK] 生成多帧特征: shape={Z_frames.shape}")
 
@@ -83,10 +80,7 @@ def main():
 
     # 生成新的多帧特征（添加更大噪声模拟真实测量）
     np.random.seed(100)  # 不同种子
-    Z_frames_auth = np.zeros((M, D))
-    for m in range(M):
-        noise = np.random.randn(D) * 0.15  # 15%噪声
-        Z_frames_auth[m] = base_feature + noise
+    Z_frames_auth = base_feature + np.random.randn(M, D) * 0.15  # 15%噪声
 
     key_output_auth, success = fe.authenticate(
         device_id=device_id,
@@ -54,10 +54,7 @@ def test_full_workflow_csi():
     base_feature = np.random.randn(D)
 
     # 生成多帧（添加少量噪声）
-    Z_frames = np.zeros((M, D))
-    for m in range(M):
-        noise = np.random.randn(D) * 0.1  # 10%噪声
-        Z_frames[m] = base_feature + noise
+    Z_frames = base_feature + np.random.randn(M, D) * 0.1  # 10%噪声
 
     print(f"✓ 生成多帧特征数据: shape={Z_frames.shape}")
 
@@ -80,10 +77,7 @@ def test_full_workflow_csi():
 
     # 6. 认证阶段（使用相似但含噪的特征）
     # 生成新的多帧特征（添加更大噪声模拟真实测量）
-    Z_frames_auth = np.zeros((M, D))
-    for m in range(M):
-        noise = np.random.randn(D) * 0.15  # 15%噪声
-        Z_frames_auth[m] = base_feature + noise
+    Z_frames_auth = base_feature + np.random.randn(M, D) * 0.15  # 15%噪声
 
     key_output_auth, success = fe.authenticate(
         device_id=device_id,